@@ -6,6 +6,8 @@ in a terminal/console.
 Source: https://github.com/aroberge/gauss-jordan-assistant
 
 Requires Python 3.8+ and Rich (https://github.com/willmcgugan/rich)
+for the console; the computation engine only uses the standard library.
+The optional symbolic mode also requires SymPy (https://www.sympy.org)
 
 All the content is in this single file, for those that do not want
 to install from Pypi and simply copy and possibly modify to suit
@@ -17,30 +19,64 @@ The organisation is as follows:
 2. Translations (French and English)
 3. String parsing using regular expressions
 4. Various LaTeX templates
-5. The main code
+5. Optional symbolic computations using SymPy
+6. The computation engine
+7. Incremental display using ANSI escape sequences
+8. The main code (console interface)
+9. Grading of student submissions
+10. Serving many sessions from a single process
+
+Importing this module has no side effect: the engine can be used
+without any console, for example
+
+    from gja import Engine
+    state = Engine([[2, 4], [3, 5]]).apply("1/2 R_1 --> R_1")
+
+Student submissions can be graded from the command line:
+
+    python gja.py grade matrix.csv submissions.json
+
+and the number of bytes written by the two display modes compared with:
+
+    python gja.py benchmark -n 8
+
+For lab sessions, a single process can serve many students, each using
+telnet or netcat to connect:
+
+    python gja.py serve --port 8023
+
 
 """
 
 __version__ = "0.3"
 
+import argparse
+import asyncio
+import csv
+import functools
+import io
+import itertools
+import json
+import math
+import os
+import pickle
 import re
-import tkinter
-from tkinter import filedialog
+import sys
+import threading
+import time
 
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from fractions import Fraction
 
 
 from rich.box import Box
 from rich.console import Console
 from rich.markdown import Markdown
+from rich.segment import Segment, Segments
 from rich.table import Table
 from rich.theme import Theme
 
-# Since we already use Rich, we might as well get pretty tracebacks. :-)
-from rich.traceback import install
-
-install(extra_lines=1)
-
 
 # ===============================================
 # Rich specific definitions
@@ -60,6 +96,7 @@ dark_background_theme = Theme(
         "row_operation": "bold yellow",
         "same_row": "bold white underline",
         "echelon": "white on dark_red",
+        "viewport": "deep_sky_blue1",
     }
 )
 
@@ -77,12 +114,10 @@ light_background_theme = Theme(
         "row_operation": "spring_green4",
         "same_row": "blue underline",
         "echelon": "black on grey85",
+        "viewport": "deep_sky_blue1",
     }
 )
 
-THEME = dark_background_theme
-console = Console(theme=THEME)
-
 theme_demo_en = """
 Colours are now as follows:
 
@@ -127,10 +162,14 @@ LANG = "en"
 translations = {"en": {}, "fr": {}}
 
 
-def _(text):
-    """Mimicking gettext translations with simple dict"""
-    if LANG in translations:
-        return translations[LANG][text]
+def _(text, lang=None):
+    """Mimicking gettext translations with simple dict;
+       the language is LANG unless lang is given.
+    """
+    if lang is None:
+        lang = LANG
+    if lang in translations:
+        return translations[lang][text]
     else:
         return translations["en"][text]
 
@@ -149,16 +188,66 @@ First, define a matrix:
 
 - `mat m x n`      : Coefficient matrix
 - `mat m x n | p`  : Augmented matrix with `p` extra columns.
+- `symbolic`       : toggles the symbolic mode (requires SymPy) for new matrices
+- `load [file] [| p]` : Matrix read from a CSV or MatrixMarket (`.mtx`) file
+- `paste [| p]`       : Matrix pasted as several rows, followed by an empty line
+
+For `load` and `paste`, the dimensions are deduced from the data;
+a `|` in a row separates the augmented columns.
+A first line `mat m x n | p` can also be used to give the dimensions.
+
+In symbolic mode, matrix elements can include parameters, like `a` or `k-1`;
+elements containing spaces must be separated by commas.
 
 Then, perform some elementary row operations:
 
 - `R_i  <-->  R_j`              : row exchange
 - `R_i  +/-  [f] R_j  -->  R_i` : linear combination (do not write `f` if `f=1`)
 - `f R_i  -->  R_i`             : multiplication by a scalar
+- `pivot i, j`                  : scales `R_i` so that its element in column `j` is 1,
+                                  then eliminates all the other elements of column `j`
+
+In symbolic mode, `f` can also be an expression between parentheses, like `(1/(k-1))`.
+
+To compute an inverse:
+
+- `inverse n` : new `n x n` matrix, augmented with the identity matrix
+- `inverse`   : augments the current (square) coefficient matrix with the identity matrix
+
+At any point, `det` shows the determinant of the (square) coefficient matrix,
+and `hint` proposes the next row operation and shows its effect.
+
+The following commands use the reduced row echelon form,
+which is computed if needed:
+
+- `solution`  : parametric solution of the system, for each augmented column
+- `nullspace` : basis of the null space of the coefficient matrix
+- `colspace`  : basis of the column space of the coefficient matrix
+
+## Several right-hand sides
+
+- `rhs add b_1 b_2 ...` : adds a right-hand side, with one element per row
+- `solve rhs`           : applies the row operations done so far to each added
+                          right-hand side, without redoing the elimination
+- `solve rhs steps`     : same, showing each step
+
+## Large matrices
+
+- `view m x n`  : only show a window of `m` rows and `n` columns
+- `view off`    : show the entire matrix
+- `up [k]`, `down [k]`, `left [k]`, `right [k]` : move the window by `k` rows or columns
+
+The window automatically follows the rows changed by a row operation.
 
 ## Other commands
 
 - `latex` : saves as a LaTeX file.
+- `display diff` : only rewrites the parts of the screen that change,
+                   for example when sharing the screen in a videoconference
+- `display full` : prints all the matrices at each step (default)
+- `growth`     : size of the matrix elements after each step
+- `growth n`   : warns when matrix elements have more than `n` bits
+- `growth off` : no more warnings
 - `help` / `aide`
 - `quit` / `exit`
 """
@@ -177,23 +266,73 @@ En premier, définir votre matrice
 
 - `mat m x n`      : matrice des coefficients
 - `mat m x n | p`  : matrice augmentée avec `p` colonnes supplémentaires
+- `symbolique`     : active ou désactive le mode symbolique (requiert SymPy) pour les nouvelles matrices
+- `charger [fichier] [| p]` : matrice lue d'un fichier CSV ou MatrixMarket (`.mtx`)
+- `coller [| p]`            : matrice collée en plusieurs lignes, suivies d'une ligne vide
+
+Pour `charger` et `coller`, les dimensions sont déduites des données;
+un `|` dans une ligne sépare les colonnes supplémentaires.
+Une première ligne `mat m x n | p` peut aussi donner les dimensions.
+
+En mode symbolique, les coefficients peuvent inclure des paramètres, comme `a` ou `k-1`;
+les coefficients contenant des espaces doivent être séparés par des virgules.
 
 Ensuite, faites des opérations élémentaires sur les lignes:
 
 - `L_i  <-->  L_j`              : échange de lignes
 - `L_i  +/-  [f] L_j  -->  L_i` : combinaison linéaire (omettre `f` si `f=1`)
 - `f L_i  -->  L_i`             : multiplication par un scalaire
+- `pivot i, j`                  : multiplie `L_i` pour que son coefficient de la colonne `j` soit 1,
+                                  puis élimine tous les autres coefficients de la colonne `j`
+
+En mode symbolique, `f` peut aussi être une expression entre parenthèses, comme `(1/(k-1))`.
+
+Pour calculer un inverse :
+
+- `inverse n` : nouvelle matrice `n x n`, augmentée de la matrice identité
+- `inverse`   : augmente la matrice (carrée) des coefficients actuelle de la matrice identité
+
+En tout temps, `det` affiche le déterminant de la matrice (carrée) des coefficients,
+et `indice` propose la prochaine opération sur les lignes et montre son effet.
+
+Les commandes suivantes utilisent la forme échelonnée réduite,
+qui est calculée au besoin :
+
+- `solution` : solution paramétrique du système, pour chaque colonne supplémentaire
+- `noyau`    : base du noyau de la matrice des coefficients
+- `image`    : base de l'espace des colonnes de la matrice des coefficients
+
+## Plusieurs seconds membres
+
+- `sm ajouter b_1 b_2 ...` : ajoute un second membre, avec un coefficient par ligne
+- `résoudre sm`            : applique à chaque second membre ajouté les opérations
+                             faites jusqu'ici, sans refaire l'élimination
+- `résoudre sm étapes`     : idem, en montrant chaque étape
+
+## Grandes matrices
+
+- `vue m x n`  : n'afficher qu'une fenêtre de `m` lignes et `n` colonnes
+- `vue off`    : afficher la matrice en entier
+- `haut [k]`, `bas [k]`, `gauche [k]`, `droite [k]` : déplace la fenêtre de `k` lignes ou colonnes
+
+La fenêtre suit automatiquement les lignes modifiées par une opération.
 
 ## Autres commandes
 
 - `latex` : sauvegarde dans un fichier LaTeX.
+- `affichage diff`    : ne réécrit que les parties de l'écran qui changent,
+                        par exemple pour partager l'écran en vidéoconférence
+- `affichage complet` : affiche toutes les matrices à chaque étape (par défaut)
+- `croissance`     : taille des coefficients après chaque étape
+- `croissance n`   : avertit lorsque des coefficients ont plus de `n` bits
+- `croissance off` : plus d'avertissements
 - `aide` / `help`
 - `quit`[ter] / `exit`
 """
 
 
-translations["en"]["help"] = Markdown(help_en)
-translations["fr"]["help"] = Markdown(help_fr)
+translations["en"]["help"] = help_en
+translations["fr"]["help"] = help_fr
 
 translations["en"]["R_or_L"] = "R"
 translations["fr"]["R_or_L"] = "L"
@@ -245,20 +384,250 @@ translations["fr"][
     "Cannot use a single line"
 ] = "Une combinaison linéaire requiert deux lignes différentes."
 
+translations["en"]["Column does not exist"] = "Column %d does not exist."
+translations["fr"]["Column does not exist"] = "La colonne %d n'existe pas."
+
+translations["en"]["Pivot cannot be zero"] = "The pivot cannot be zero."
+translations["fr"]["Pivot cannot be zero"] = "Le pivot ne peut pas être zéro."
+
 translations["en"]["Nothing to save"] = "Nothing to save: no matrix defined."
 translations["fr"]["Nothing to save"] = "Il n'y a aucune matrice de définie."
 
 translations["en"]["saved file"] = "Content saved in file %s"
 translations["fr"]["saved file"] = "Sauvegarde dans le fichier %s"
 
+translations["en"]["Cannot read file"] = "Cannot read file %s"
+translations["fr"]["Cannot read file"] = "Impossible de lire le fichier %s"
+
+translations["en"][
+    "Paste rows"
+] = "Paste the rows of the matrix, followed by an empty line:"
+translations["fr"][
+    "Paste rows"
+] = "Collez les lignes de la matrice, suivies d'une ligne vide :"
+
+translations["en"]["Load errors"] = "%d error(s) found; no matrix was created."
+translations["fr"][
+    "Load errors"
+] = "%d erreur(s) trouvée(s); aucune matrice n'a été créée."
+
+translations["en"]["Malformed element"] = "Line %d, element %d: '%s' is not a number."
+translations["fr"][
+    "Malformed element"
+] = "Ligne %d, coefficient %d : « %s » n'est pas un nombre."
+
+translations["en"]["Wrong row length"] = "Line %d: %d matrix elements instead of %d."
+translations["fr"][
+    "Wrong row length"
+] = "Ligne %d : %d coefficients au lieu de %d."
+
+translations["en"][
+    "Misplaced bar"
+] = "Line %d: the vertical bar is not at the same place as in the first row."
+translations["fr"][
+    "Misplaced bar"
+] = "Ligne %d : la barre verticale n'est pas à la même place que dans la première ligne."
+
+translations["en"][
+    "Header mismatch"
+] = "The data does not have the dimensions given in the header."
+translations["fr"][
+    "Header mismatch"
+] = "Les données n'ont pas les dimensions indiquées dans l'en-tête."
+
+translations["en"]["No data"] = "No matrix elements found."
+translations["fr"]["No data"] = "Aucun coefficient trouvé."
+
+translations["en"]["Unsupported MatrixMarket"] = "Unsupported MatrixMarket header: %s"
+translations["fr"][
+    "Unsupported MatrixMarket"
+] = "En-tête MatrixMarket non supporté : %s"
+
+translations["en"]["Invalid size line"] = "Line %d: invalid size line."
+translations["fr"]["Invalid size line"] = "Ligne %d : dimensions invalides."
+
+translations["en"]["Malformed entry"] = "Line %d: malformed entry '%s'."
+translations["fr"]["Malformed entry"] = "Ligne %d : entrée « %s » mal formée."
+
+translations["en"][
+    "Wrong number of entries"
+] = "%d entries expected, %d found."
+translations["fr"][
+    "Wrong number of entries"
+] = "%d entrées attendues, %d trouvées."
+
+translations["en"][
+    "Too many augmented columns"
+] = "There must be fewer augmented columns than columns."
+translations["fr"][
+    "Too many augmented columns"
+] = "Il doit y avoir moins de colonnes supplémentaires que de colonnes."
+
+translations["en"][
+    "SymPy required"
+] = "SymPy must be installed to use the symbolic mode."
+translations["fr"][
+    "SymPy required"
+] = "SymPy doit être installé pour utiliser le mode symbolique."
+
+translations["en"]["Symbolic on"] = "Symbolic mode enabled for new matrices."
+translations["fr"][
+    "Symbolic on"
+] = "Mode symbolique activé pour les nouvelles matrices."
+
+translations["en"]["Symbolic off"] = "Symbolic mode disabled for new matrices."
+translations["fr"][
+    "Symbolic off"
+] = "Mode symbolique désactivé pour les nouvelles matrices."
+
+translations["en"]["Symbolic matrix required"] = "This matrix is not symbolic."
+translations["fr"][
+    "Symbolic matrix required"
+] = "Cette matrice n'est pas symbolique."
+
+translations["en"][
+    "Growth warning"
+] = "Warning: matrix elements now have up to %d bits."
+translations["fr"][
+    "Growth warning"
+] = "Attention : les coefficients ont maintenant jusqu'à %d bits."
+
+translations["en"]["Growth threshold"] = "Warning threshold: %s bits"
+translations["fr"]["Growth threshold"] = "Seuil d'avertissement : %s bits"
+
+translations["en"]["Step"] = "Step"
+translations["fr"]["Step"] = "Étape"
+
+translations["en"]["Numerator bits"] = "Numerator bits"
+translations["fr"]["Numerator bits"] = "Bits du numérateur"
+
+translations["en"]["Denominator bits"] = "Denominator bits"
+translations["fr"]["Denominator bits"] = "Bits du dénominateur"
+
+translations["en"]["Size (bytes)"] = "Size (bytes)"
+translations["fr"]["Size (bytes)"] = "Taille (octets)"
+
+translations["en"][
+    "Graded"
+] = "%d submissions graded: %d legal, %d in reduced row echelon form."
+translations["fr"][
+    "Graded"
+] = "%d soumissions corrigées : %d valides, %d sous forme échelonnée réduite."
+
+translations["en"]["No matrix"] = "No matrix defined."
+translations["fr"]["No matrix"] = "Aucune matrice n'est définie."
+
+translations["en"][
+    "Empty view"
+] = "The window must have at least one row and one column."
+translations["fr"][
+    "Empty view"
+] = "La fenêtre doit avoir au moins une ligne et une colonne."
+
+translations["en"]["Square matrix required"] = "The coefficient matrix must be square."
+translations["fr"][
+    "Square matrix required"
+] = "La matrice des coefficients doit être carrée."
+
+translations["en"]["Determinant"] = "det = %s"
+translations["fr"]["Determinant"] = "dét = %s"
+
+translations["en"]["Viewport"] = "Rows %d-%d of %d; columns %d-%d of %d"
+translations["fr"]["Viewport"] = "Lignes %d-%d sur %d; colonnes %d-%d sur %d"
+
+translations["en"]["Null space basis"] = "Basis of the null space:"
+translations["fr"]["Null space basis"] = "Base du noyau :"
+
+translations["en"][
+    "Null space zero"
+] = "The null space only contains the zero vector."
+translations["fr"]["Null space zero"] = "Le noyau ne contient que le vecteur nul."
+
+translations["en"][
+    "Column space basis"
+] = "Basis of the column space (pivot columns of the matrix as entered):"
+translations["fr"][
+    "Column space basis"
+] = "Base de l'espace des colonnes (colonnes pivots de la matrice initiale) :"
+
+translations["en"][
+    "Column space zero"
+] = "The column space only contains the zero vector."
+translations["fr"][
+    "Column space zero"
+] = "L'espace des colonnes ne contient que le vecteur nul."
+
+translations["en"]["No solution"] = "The system has no solution."
+translations["fr"]["No solution"] = "Le système n'a aucune solution."
+
+translations["en"]["Free variable"] = "x_%d is free"
+translations["fr"]["Free variable"] = "x_%d est libre"
+
+translations["en"]["Right-hand side"] = "Right-hand side %d:"
+translations["fr"]["Right-hand side"] = "Second membre %d :"
+
+translations["en"]["Full frames"] = "Full frames (bytes)"
+translations["fr"]["Full frames"] = "Affichage complet (octets)"
+
+translations["en"]["Changes only"] = "Changes only (bytes)"
+translations["fr"]["Changes only"] = "Changements seulement (octets)"
+
+translations["en"][
+    "Local files only"
+] = "This command is not available in a remote session."
+translations["fr"][
+    "Local files only"
+] = "Cette commande n'est pas disponible dans une session à distance."
+
+translations["en"]["Session name"] = "Session name: "
+translations["fr"]["Session name"] = "Nom de la session : "
+
+translations["en"][
+    "Invalid session name"
+] = "A session name can only contain letters, digits and underscores."
+translations["fr"][
+    "Invalid session name"
+] = "Un nom de session ne peut contenir que des lettres, chiffres et soulignés."
+
+translations["en"]["Session already open"] = "Session %s is already open."
+translations["fr"]["Session already open"] = "La session %s est déjà ouverte."
+
+translations["en"]["Serving"] = "Serving sessions on %s:%d"
+translations["fr"]["Serving"] = "Sessions servies sur %s:%d"
+
+translations["en"]["Hint"] = "Hint: %s"
+translations["fr"]["Hint"] = "Indice : %s"
+
+translations["en"][
+    "Already reduced"
+] = "The matrix is already in reduced row echelon form."
+translations["fr"][
+    "Already reduced"
+] = "La matrice est déjà sous forme échelonnée réduite."
+
+translations["en"][
+    "Symbolic hint"
+] = "Hints are not available for symbolic matrices."
+translations["fr"][
+    "Symbolic hint"
+] = "Les indices ne sont pas disponibles pour les matrices symboliques."
+
+translations["en"]["RHS added"] = "Right-hand side %d added."
+translations["fr"]["RHS added"] = "Second membre %d ajouté."
+
+translations["en"]["No RHS"] = "No right-hand side added; use: rhs add ..."
+translations["fr"]["No RHS"] = "Aucun second membre ajouté; utilisez : sm ajouter ..."
+
 # ===============================================
 # String parsing using regular expressions
 # ===============================================
 
 
-re_quit = re.compile(r"(quit|exit).*", re.IGNORECASE)
+# Anchored, since commands like load take a file name which could
+# contain these words.
+re_quit = re.compile(r"^\s*(quit|exit)\s*$", re.IGNORECASE)
 
-re_help = re.compile(r"(help|aide).*", re.IGNORECASE)
+re_help = re.compile(r"^\s*(help|aide)\s*$", re.IGNORECASE)
 
 # matches integers or fractions as in 1 22 2/33 , etc.
 re_fract = re.compile(r"(-?\d+/?\d*)")  # /?  means zero or 1 /
@@ -269,22 +638,23 @@ re_fract = re.compile(r"(-?\d+/?\d*)")  # /?  means zero or 1 /
 # For simplicity, instead of R for row, we can use L (ligne, en français):
 #    either L or R will work in any context.
 # Also for simplicity, R_2 is identical to R2
-# Finally, we limit the row number to be a single digit.
+# Row numbers can have more than one digit, so that large matrices
+# (see the viewport commands) can be used.
 
 re_row_lin_combo_2 = re.compile(
     r"""^         # line begins
         \s*
-        [LR]_?(\d)  # original row; can use either L or R to denote a row
+        [LR]_?(\d+)  # original row; can use either L or R to denote a row
         \s*
         (\+|-)    # plus or minus
         \s*
         (\d+/?\d*)  # integer or fraction
         \s*
-        [LR]_?(\d)   # other row
+        [LR]_?(\d+)   # other row
         \s*
         -+>        # arrow -->
         \s*
-        [LR]_?(\d)   # target line
+        [LR]_?(\d+)   # target line
         \s*
         $          # end of line
         """,
@@ -298,17 +668,285 @@ re_mat = re.compile(r"^\s*mat\s*(\d+)\s*x\s*(\d+)\s*$", re.IGNORECASE)
 # mat 3 x 4 | 1
 re_aug_mat = re.compile(r"^\s*mat\s*(\d+)\s*x\s*(\d+)\s*\|\s*(\d+)\s*$", re.IGNORECASE,)
 
+# load matrix.csv | 1
+# The file name is optional; a file dialog is used if it is absent.
+re_load = re.compile(
+    r"^\s*(?:load|charger)\b\s*(.*?)\s*(?:\|\s*(\d+))?\s*$", re.IGNORECASE
+)
+
+# paste | 1
+re_paste = re.compile(r"^\s*(?:paste|coller)\s*(?:\|\s*(\d+))?\s*$", re.IGNORECASE)
+
+# Separates matrix elements in CSV files and pasted rows
+re_separator = re.compile(r"[\s,;]+")
+
 # The following matches R_2 <--> R_3 and similar operations
-re_row_interchange = re.compile(r"""^\s*[LR]_?(\d)\s*<-+>\s*[LR]_?(\d)\s*$""")
+re_row_interchange = re.compile(r"""^\s*[LR]_?(\d+)\s*<-+>\s*[LR]_?(\d+)\s*$""")
 
 # This matches something like 1/2 R_3 --> R_3
-re_row_scaling = re.compile(r"^\s*(-?\d+/?\d*)\s*[LR]_?(\d)\s*-+>\s*[LR]_?(\d)\s*$")
+re_row_scaling = re.compile(r"^\s*(-?\d+/?\d*)\s*[LR]_?(\d+)\s*-+>\s*[LR]_?(\d+)\s*$")
 
 # This matches something like R_2 - R_3 --> R_2
 re_row_lin_combo_1 = re.compile(
-    r"^\s*[LR]_?(\d)\s*(\+|-)\s*[LR]_?(\d)\s*-+>\s*[LR]_?(\d)\s*$"
+    r"^\s*[LR]_?(\d+)\s*(\+|-)\s*[LR]_?(\d+)\s*-+>\s*[LR]_?(\d+)\s*$"
+)
+
+re_det = re.compile(r"^\s*d[eé]t\s*$", re.IGNORECASE)
+
+# inverse 3, or simply inverse to use the current matrix
+re_inverse = re.compile(r"^\s*inverse\s*(\d*)\s*$", re.IGNORECASE)
+
+# growth, growth 64 or growth off
+re_growth = re.compile(r"^\s*(?:growth|croissance)\s*(\d+|off)?\s*$", re.IGNORECASE)
+
+re_symbolic = re.compile(r"^\s*(symbolic|symbolique)\s*$", re.IGNORECASE)
+
+# pivot 2, 1   (row 2, column 1)
+re_pivot = re.compile(r"^\s*pivot\s*(\d+)\s*,\s*(\d+)\s*$", re.IGNORECASE)
+
+# In symbolic mode, factors can be expressions written between parentheses,
+# as in (1/(k-1)) R_2 --> R_2  or  R_3 - (k+1) R_1 --> R_3
+re_row_scaling_symbolic = re.compile(
+    r"^\s*\((.+)\)\s*[LR]_?(\d+)\s*-+>\s*[LR]_?(\d+)\s*$"
+)
+re_row_lin_combo_symbolic = re.compile(
+    r"^\s*[LR]_?(\d+)\s*(\+|-)\s*\((.+)\)\s*[LR]_?(\d+)\s*-+>\s*[LR]_?(\d+)\s*$"
+)
+
+# rhs add 1 2 3   (sm: second membre, en français)
+re_rhs_add = re.compile(r"^\s*(?:rhs|sm)\s+(?:add|ajouter)\s+(.+?)\s*$", re.IGNORECASE)
+
+# solve rhs, or solve rhs steps to show each step
+re_solve_rhs = re.compile(
+    r"^\s*(?:solve|r[eé]soudre)\s+(?:rhs|sm)\s*(steps|[eé]tapes)?\s*$", re.IGNORECASE
+)
+
+re_hint = re.compile(r"^\s*(?:hint|indice)\s*$", re.IGNORECASE)
+
+re_solution = re.compile(r"^\s*solution\s*$", re.IGNORECASE)
+
+re_nullspace = re.compile(r"^\s*(?:nullspace|noyau)\s*$", re.IGNORECASE)
+
+re_colspace = re.compile(r"^\s*(?:colspace|image)\s*$", re.IGNORECASE)
+
+# display diff, to only write the changes to the matrix, or display full
+re_display = re.compile(
+    r"^\s*(?:display|affichage)\s+(diff|full|complet)\s*$", re.IGNORECASE
+)
+
+DISPLAY_MODES = {"diff": "diff", "full": "full", "complet": "full"}
+
+# view 10 x 8
+re_view = re.compile(r"^\s*(?:view|vue)\s*(\d+)\s*x\s*(\d+)\s*$", re.IGNORECASE)
+
+# view off
+re_view_off = re.compile(r"^\s*(?:view|vue)\s+off\s*$", re.IGNORECASE)
+
+# down 3, or simply down
+re_scroll = re.compile(
+    r"^\s*(up|down|left|right|haut|bas|gauche|droite)\s*(\d*)\s*$", re.IGNORECASE
 )
 
+SCROLL_DIRECTIONS = {
+    "up": (-1, 0),
+    "haut": (-1, 0),
+    "down": (1, 0),
+    "bas": (1, 0),
+    "left": (0, -1),
+    "gauche": (0, -1),
+    "right": (0, 1),
+    "droite": (0, 1),
+}
+
+
+def parse_rows(lines, lang=None):
+    """Parses the rows of a matrix, one per line, as found in a CSV file
+       or pasted by the user.
+
+       Matrix elements are separated by commas, semicolons or spaces;
+       a vertical bar separates the coefficients from the augmented
+       columns. An optional first line like
+
+           mat m x n | p
+
+       gives the dimensions of the matrix. Empty lines and lines
+       starting with # or % are ignored.
+
+       All the lines are parsed, even when errors are found, so that
+       they can all be reported at once.
+
+       Returns a tuple (rows, nb_augmented_cols, errors); the error
+       messages are in the language lang, LANG by default.
+    """
+    rows = []
+    errors = []
+    header = None
+    nb_augmented_cols = None
+    nb_elements = None
+    first_row_has_bar = False
+
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith(("#", "%")):
+            continue
+        if not rows and header is None:
+            if op := re.search(re_mat, line) or re.search(re_aug_mat, line):
+                header = [int(group) for group in op.groups()] + [0]
+                continue
+
+        coefficients, bar, augmented = line.partition("|")
+        entries = [entry for entry in re_separator.split(coefficients) if entry]
+        augmented = [entry for entry in re_separator.split(augmented) if entry]
+        if nb_augmented_cols is None:
+            nb_augmented_cols = len(augmented)
+            nb_elements = len(entries) + nb_augmented_cols
+            first_row_has_bar = bool(bar)
+        elif len(augmented) != nb_augmented_cols and bar:
+            errors.append(_("Misplaced bar", lang) % line_no)
+        entries += augmented
+
+        row = []
+        for col_no, entry in enumerate(entries, 1):
+            try:
+                row.append(Fraction(entry.strip("\"'")))
+            except (ValueError, ZeroDivisionError):
+                errors.append(_("Malformed element", lang) % (line_no, col_no, entry))
+        if len(entries) != nb_elements:
+            errors.append(
+                _("Wrong row length", lang) % (line_no, len(entries), nb_elements)
+            )
+        rows.append(row)
+
+    if not rows:
+        errors.append(_("No data", lang))
+    elif header is not None:
+        nb_rows, nb_cols, nb_header_augmented_cols = header[:3]
+        if (
+            len(rows) != nb_rows
+            or nb_elements != nb_cols + nb_header_augmented_cols
+            or (first_row_has_bar and nb_augmented_cols != nb_header_augmented_cols)
+        ):
+            errors.append(_("Header mismatch", lang))
+        nb_augmented_cols = nb_header_augmented_cols
+    return rows, nb_augmented_cols, errors
+
+
+def parse_matrix_market(lines, lang=None):
+    """Parses a file in the MatrixMarket exchange format
+       (https://math.nist.gov/MatrixMarket/formats.html), using
+       either the coordinate or the array format.
+
+       All the lines are parsed, even when errors are found, so that
+       they can all be reported at once.
+
+       Returns a tuple (rows, nb_augmented_cols, errors); the error
+       messages are in the language lang, LANG by default.
+    """
+    lines = enumerate(lines, 1)
+    banner = next(lines, (1, ""))[1]
+    header = banner.lower().split()
+    if (
+        len(header) != 5
+        or header[0] != "%%matrixmarket"
+        or header[1] != "matrix"
+        or header[2] not in ("coordinate", "array")
+        or header[3] not in ("real", "integer", "pattern")
+        or header[4] not in ("general", "symmetric", "skew-symmetric")
+        or (header[2], header[3]) == ("array", "pattern")
+    ):
+        return [], 0, [_("Unsupported MatrixMarket", lang) % banner.strip()]
+    mm_format, field, symmetry = header[2:]
+
+    size = None
+    entries = []
+    errors = []
+    for line_no, line in lines:
+        line = line.strip()
+        if not line or line.startswith("%"):
+            continue
+        if size is None:
+            try:
+                size = [int(value) for value in line.split()]
+            except ValueError:
+                size = []
+            if (
+                len(size) != (3 if mm_format == "coordinate" else 2)
+                or size[0] <= 0
+                or size[1] <= 0
+                or any(value < 0 for value in size[2:])
+            ):
+                return [], 0, [_("Invalid size line", lang) % line_no]
+            continue
+        entries.append((line_no, line))
+
+    if size is None:
+        return [], 0, [_("No data", lang)]
+    nb_rows, nb_cols = size[:2]
+    rows = [[Fraction(0)] * nb_cols for row in range(nb_rows)]
+
+    if mm_format == "coordinate":
+        nb_expected = size[2]
+        for line_no, line in entries:
+            try:
+                i, j, *value = line.split()
+                i, j = int(i) - 1, int(j) - 1
+                if field == "pattern":
+                    value = [1] + value
+                (value,) = value
+                value = Fraction(value)
+                if not (0 <= i < nb_rows and 0 <= j < nb_cols):
+                    raise ValueError
+                # Only the lower triangle is listed for (skew-)symmetric
+                # matrices, without the zero diagonal if skew-symmetric.
+                if (symmetry == "symmetric" and i < j) or (
+                    symmetry == "skew-symmetric" and i <= j
+                ):
+                    raise ValueError
+            except (ValueError, ZeroDivisionError):
+                errors.append(_("Malformed entry", lang) % (line_no, line))
+                continue
+            rows[i][j] = value
+            if i != j and symmetry == "symmetric":
+                rows[j][i] = value
+            elif i != j and symmetry == "skew-symmetric":
+                rows[j][i] = -value
+    else:
+        # Values are listed in column-major order; only the lower
+        # triangle is listed for (skew-)symmetric matrices.
+        if symmetry == "general":
+            positions = [(i, j) for j in range(nb_cols) for i in range(nb_rows)]
+        else:
+            first = 0 if symmetry == "symmetric" else 1
+            positions = [
+                (i, j) for j in range(nb_cols) for i in range(j + first, nb_rows)
+            ]
+        nb_expected = len(positions)
+        for (line_no, line), (i, j) in zip(entries, positions):
+            try:
+                rows[i][j] = Fraction(line)
+            except (ValueError, ZeroDivisionError):
+                errors.append(_("Malformed entry", lang) % (line_no, line))
+                continue
+            if i != j and symmetry == "symmetric":
+                rows[j][i] = rows[i][j]
+            elif symmetry == "skew-symmetric":
+                rows[j][i] = -rows[i][j]
+
+    if len(entries) != nb_expected:
+        errors.append(_("Wrong number of entries", lang) % (nb_expected, len(entries)))
+    return rows, 0, errors
+
+
+def read_matrix_file(filename, lang=None):
+    """Reads a matrix from a MatrixMarket file (.mtx) or, otherwise,
+       from a CSV file; see parse_matrix_market and parse_rows.
+       Raises OSError or UnicodeDecodeError if the file cannot be read.
+    """
+    with open(filename, encoding="utf8") as f:
+        if filename.lower().endswith(".mtx"):
+            return parse_matrix_market(f, lang)
+        return parse_rows(f, lang)
+
 
 # ===============================================
 # LaTeX templates
@@ -348,6 +986,9 @@ LaTeX_begin_document = """
 LaTeX_end_document = "\\end{document}"
 
 
+LaTeX_growth_comment = """
+%% Frame %d: numerator bits = %d, denominator bits = %d, size = %d bytes"""
+
 LaTeX_begin_frame = """
 \\begin{frame}{Frame %d}
 \\[
@@ -370,199 +1011,1886 @@ LaTeX_begin_row_op_matrix = "\\begin{matrix}[r]"
 LaTeX_end_row_op_matrix = "\\end{matrix}\n"
 
 
+# ===============================================
+# Optional symbolic computations using SymPy
+#
+# SymPy is only imported when the symbolic mode is first used,
+# so that it adds no startup cost otherwise.
 # ===============================================
 
+sympy = None
 
-RIGHT_ARROW = "-->"  # used in printing row operations
+SIMPLIFY_CACHE_SIZE = 4096
 
 
-class Assistant:
-    """Enables user-driven live demonstration of Gauss-Jordan algorithm."""
+def import_sympy():
+    """Imports SymPy, if needed. Returns False if it is not available."""
+    global sympy
+    if sympy is None:
+        try:
+            import sympy
+        except ImportError:
+            return False
+    return True
 
-    def __init__(self):
-        self.prompt = self.default_prompt = "> "
-        self.matrix = None
-        print("lang =", LANG)
-        self.interact()
 
-    def interact(self):
-        """Command interpreter"""
-        while True:
-            command = self.user_input()
+@functools.lru_cache(maxsize=SIMPLIFY_CACHE_SIZE)
+def cached_simplify(expr):
+    """Simplifies a SymPy expression.
 
-            if re.search(re_quit, command):
-                break
+    After each row operation, every modified matrix element is simplified;
+    many of them, such as zeros and the unchanged elements of
+    linear combinations, are seen over and over again.
+    """
+    return sympy.simplify(expr)
 
-            result = self.parse(command)
 
-            if result and self.matrix is not None:
-                self.console_print()
-                self.update_latex_content()
-                self.current_row_operations.clear()
-                self.latex_current_row_operations.clear()
+def is_negative(number):
+    """Returns True if a fraction is negative or if a SymPy expression,
+       such as -2 or -a, is written with a leading minus sign.
+    """
+    if isinstance(number, Fraction):
+        return number < 0
+    return number.could_extract_minus_sign()
 
-    def parse(self, command):
-        """Parses command controlling the information displayed.
-           To show the latest matrix update, an operation must return True.
-        """
-        global console, LANG, THEME
 
-        lowercase = command.lower()
+# ===============================================
+# The computation engine
+#
+# Engine performs the row operations without any user interface:
+# it prints nothing, does not depend on the language chosen by the
+# user, and reports invalid operations by raising RowOperationError.
+# The console interface (Assistant) is built on top of it.
+#
+# When calling Engine methods directly, rows and columns are numbered
+# from 0; in commands, as in the console, they are numbered from 1.
+# ===============================================
 
-        if lowercase in ["colors", "colours", "couleurs"]:
-            if THEME == dark_background_theme:
-                THEME = light_background_theme
-            else:
-                THEME = dark_background_theme
-            console = Console(theme=THEME)
-            if LANG == "en":
-                console.print(theme_demo_en)
-            else:
-                console.print(theme_demo_fr)
+# The matrix (a tuple of rows), its determinant (None unless the
+# coefficient matrix is square) and the RowOperations done to obtain it.
+State = namedtuple("State", ["matrix", "determinant", "operations"])
+
+# Change of the target row by an elementary row operation, where kind is
+#   "interchange": row is moved to target
+#   "scale":       target is multiplied by factor
+#   "combo":       target op factor * row --> target; factor is None
+#                  when it is omitted, as in R_1 + R_2 --> R_1
+RowOperation = namedtuple("RowOperation", ["target", "kind", "row", "op", "factor"])
+
+# Parameters of the search for hints: number of row operations looked ahead,
+# number of most promising operations explored further at each step, cost
+# of each operation and penalty per bit of the numerators and denominators.
+HINT_DEPTH = 3
+HINT_BEAM = 3
+HINT_STEP_COST = 1
+HINT_GROWTH_WEIGHT = 1 / 64
+# The transposition table is emptied when it reaches this size
+HINT_TABLE_SIZE = 100_000
+
+
+class RowOperationError(ValueError):
+    """Raised by Engine when a row operation cannot be performed.
+
+    key identifies the message in translations and params are the
+    values inserted in it.
+    """
+
+    def __init__(self, key, *params):
+        super().__init__(key, *params)
+        self.key = key
+        self.params = params
+
+    def message(self, lang="en"):
+        return translations[lang][self.key] % self.params
+
+    def __str__(self):
+        return self.message()
+
+
+def to_number(entry, symbolic=False):
+    """Converts a matrix element, or a factor, to a fraction or,
+       if symbolic is True, to a simplified SymPy expression.
+       Raises RowOperationError if this cannot be done.
+    """
+    if symbolic:
+        try:
+            number = cached_simplify(sympy.sympify(entry, rational=True))
+        except Exception:
+            raise RowOperationError("Wrong format") from None
+        # Division by zero gives infinite or undefined values
+        if number.has(sympy.zoo, sympy.nan, sympy.oo, -sympy.oo):
+            raise RowOperationError("Wrong format")
+        return number
+    if isinstance(entry, Fraction):
+        return entry
+    try:
+        return Fraction(entry)
+    except (TypeError, ValueError, ZeroDivisionError):
+        if isinstance(entry, str) and re.search("[a-zA-Z]", entry):
+            raise RowOperationError("Symbolic matrix required") from None
+        raise RowOperationError("Wrong format") from None
+
+
+def parse_row_operation(command):
+    """Parses a command for an elementary row operation.
+
+       Returns the name of the Engine method performing it and its
+       arguments, with factors left as strings.
+       Raises RowOperationError if this is not a row operation.
+    """
+    if op := re.search(re_pivot, command):
+        return "pivot", (int(op.group(1)) - 1, int(op.group(2)) - 1)
+
+    elif op := re.search(re_row_interchange, command):
+        return "interchange_rows", (int(op.group(1)) - 1, int(op.group(2)) - 1)
+
+    elif op := re.search(re_row_scaling, command) or re.search(
+        re_row_scaling_symbolic, command
+    ):
+        return "scale_row", (op.group(1), int(op.group(2)) - 1, int(op.group(3)) - 1)
+
+    elif op := re.search(re_row_lin_combo_1, command):
+        return (
+            "linear_combo_1",
+            (
+                int(op.group(1)) - 1,
+                op.group(2),
+                int(op.group(3)) - 1,
+                int(op.group(4)) - 1,
+            ),
+        )
 
-        elif lowercase in ["en", "fr"]:
-            if lowercase == LANG:
-                console.print(_("No effect"))
-            else:
-                LANG = lowercase
-                print("lang =", LANG)
+    elif op := re.search(re_row_lin_combo_2, command) or re.search(
+        re_row_lin_combo_symbolic, command
+    ):
+        return (
+            "linear_combo_2",
+            (
+                int(op.group(1)) - 1,
+                op.group(2),
+                op.group(3),
+                int(op.group(4)) - 1,
+                int(op.group(5)) - 1,
+            ),
+        )
 
-        elif command.lower() == "latex":
-            self.save_latex()
+    raise RowOperationError("Unknown operation")
 
-        elif re.search(re_help, command):
-            console.print(_("help"), "\n")
 
-        elif op := re.search(re_mat, command):
-            return self.new_matrix(int(op.group(1)), int(op.group(2)))
+class Engine:
+    """Performs exact elementary row operations on a matrix.
 
-        elif op := re.search(re_aug_mat, command):
-            return self.new_matrix(int(op.group(1)), int(op.group(2)), int(op.group(3)))
+    The first nb_cols columns form the coefficient matrix; the last
+    nb_augmented_cols columns are those of an augmented matrix.
+    Matrix elements are fractions or, if symbolic is True, SymPy
+    expressions.
 
-        elif op := re.search(re_row_interchange, command):
-            return self.interchange_rows(int(op.group(1)), int(op.group(2)))
+    Each row operation returns the new State, for example:
 
-        elif op := re.search(re_row_scaling, command):
-            return self.scale_row(
-                Fraction(op.group(1)), int(op.group(2)), int(op.group(3))
-            )
+        engine = Engine([[1, 2, 3], [4, 5, 6]], nb_augmented_cols=1)
+        state = engine.apply("R_2 - 4 R_1 --> R_2")
+        state = engine.scale_row(Fraction(-1, 3), 1)
+    """
 
-        elif op := re.search(re_row_lin_combo_1, command):
-            return self.linear_combo_1(
-                int(op.group(1)), op.group(2), int(op.group(3)), int(op.group(4)),
+    def __init__(self, rows, nb_augmented_cols=0, symbolic=False):
+        if symbolic and not import_sympy():
+            raise ImportError(translations["en"]["SymPy required"])
+        self.is_symbolic = symbolic
+        # Row operations replace rows instead of modifying them,
+        # so that successive states can share the unchanged rows.
+        self.matrix = [tuple(to_number(x, symbolic) for x in row) for row in rows]
+        self.nb_rows = len(self.matrix)
+        self.total_nb_cols = len(self.matrix[0]) if self.matrix else 0
+        if any(len(row) != self.total_nb_cols for row in self.matrix):
+            raise ValueError("All rows must have the same number of elements.")
+        self.nb_augmented_cols = nb_augmented_cols
+        self.nb_cols = self.total_nb_cols - nb_augmented_cols
+        self.determinant = self.compute_determinant()
+        self.initial_matrix = tuple(self.matrix)
+        # The operations done at each step, so that they can be replayed
+        # on other rows, such as new right-hand sides; None to disable.
+        self.log = []
+        # Reduced row echelon form and pivots, computed when first needed
+        # and discarded when a row operation changes the matrix.
+        self.rref_cache = None
+        # Results of the search for hints, by (matrix, depth)
+        self.hint_table = {}
+        # Features of the rows scored during the search, by id(row)
+        self.row_features = {}
+
+    def state(self, operations=()):
+        """Returns the current State, with the operations just done."""
+        return State(tuple(self.matrix), self.determinant, tuple(operations))
+
+    def record(self, operations):
+        """Adds the operations just done to the log, as a single step,
+           and returns the new State.
+        """
+        if self.log is not None:
+            self.log.append(tuple(operations))
+        self.rref_cache = None
+        return self.state(operations)
+
+    def replay(self, rows):
+        """Applies the logged row operations to other rows having
+           one element per row of the matrix; for example, a new
+           right-hand side is given as a column of one-element rows.
+           Each operation takes a time proportional to the length of
+           a row, so that no elimination is ever redone.
+
+           Yields, after each step, its operations and the rows obtained;
+           the list of rows is updated in place by the next step.
+        """
+        rows = [tuple(to_number(x, self.is_symbolic) for x in row) for row in rows]
+        if len(rows) != self.nb_rows:
+            raise ValueError("There must be one row per row of the matrix.")
+        for operations in self.log or ():
+            for operation in operations:
+                self.replay_operation(rows, operation)
+            yield operations, rows
+
+    def replay_operation(self, rows, operation):
+        """Applies a single logged RowOperation to a list of rows."""
+        target, kind, row, op, factor = operation
+        if kind == "interchange":
+            # An interchange is logged as two operations, one per row;
+            # the rows are exchanged only once.
+            if target > row:
+                rows[target], rows[row] = rows[row], rows[target]
+        elif kind == "scale":
+            rows[target] = self.simplify_row(factor * x for x in rows[target])
+        else:
+            factor = (1 if op == "+" else -1) * (1 if factor is None else factor)
+            rows[target] = self.simplify_row(
+                x + factor * y for x, y in zip(rows[target], rows[row])
             )
 
-        elif op := re.search(re_row_lin_combo_2, command):
-            return self.linear_combo_2(
-                int(op.group(1)),
-                op.group(2),
-                Fraction(op.group(3)),
-                int(op.group(4)),
-                int(op.group(5)),
-            )
+    def simplify_row(self, row):
+        """Returns the row as a tuple, with each element simplified
+           for a symbolic matrix.
+        """
+        if self.is_symbolic:
+            return tuple(cached_simplify(entry) for entry in row)
+        return tuple(row)
 
-        else:
-            self.print_error(_("Unknown operation"))
+    def apply(self, command):
+        """Performs a row operation written as a command, such as
 
-    def new_matrix(self, nb_rows, nb_cols, nb_augmented_cols=0):
-        """Sets the parameters for a new matrix.
+            R_2 - 4 R_1 --> R_2
 
-        This is called after a command like
+        Returns the new State.
+        """
+        name, args = parse_row_operation(command)
+        return getattr(self, name)(*args)
 
-            mat m x n
-            mat m x n | p
+    def compute_determinant(self):
+        """Computes the determinant of a new square coefficient matrix
+           using the fraction-free Bareiss algorithm.
+           Afterwards, the value is updated by each row operation,
+           so that it never needs to be recomputed.
 
+           Returns None if the coefficient matrix is not square.
         """
-        self.matrix = []
-        self.previously_formatted_matrix = None
-        self.nb_requested_rows = nb_rows
-        self.nb_rows = 0
-        self.nb_cols = nb_cols
-        self.nb_augmented_cols = nb_augmented_cols
-        self.total_nb_cols = nb_cols + nb_augmented_cols
-        self.current_row_operations = {}
+        n = self.nb_cols
+        if self.nb_rows != n or n == 0:
+            return None
+        if self.is_symbolic:
+            coefficients = sympy.Matrix([row[:n] for row in self.matrix])
+            return cached_simplify(coefficients.det(method="bareiss"))
+
+        # Each row is multiplied by the lowest common denominator
+        # of its elements so that we only work with integers.
+        scale = 1
+        a = []
+        for row in self.matrix:
+            lcd = 1
+            for x in row[:n]:
+                lcd = lcd * x.denominator // math.gcd(lcd, x.denominator)
+            scale *= lcd
+            a.append([x.numerator * (lcd // x.denominator) for x in row[:n]])
+
+        sign = 1
+        previous_pivot = 1
+        for k in range(n - 1):
+            if a[k][k] == 0:
+                for i in range(k + 1, n):
+                    if a[i][k] != 0:
+                        a[k], a[i] = a[i], a[k]
+                        sign = -sign
+                        break
+                else:
+                    return Fraction(0)
+            for i in range(k + 1, n):
+                for j in range(k + 1, n):
+                    # This division is always exact
+                    a[i][j] = (a[i][j] * a[k][k] - a[i][k] * a[k][j]) // previous_pivot
+            previous_pivot = a[k][k]
+        return Fraction(sign * a[n - 1][n - 1], scale)
+
+    def is_reduced_row_echelon_form(self):
+        """Returns True if the matrix is in reduced row echelon form."""
+        pivot_col = -1
+        for row_idx, row in enumerate(self.matrix):
+            for col_idx, entry in enumerate(row):
+                if entry != 0:
+                    break
+            else:
+                # A row of zeros: all the following rows must also be zero
+                return all(
+                    entry == 0 for row in self.matrix[row_idx:] for entry in row
+                )
+            if col_idx <= pivot_col or entry != 1:
+                return False
+            pivot_col = col_idx
+            if any(
+                other[pivot_col] != 0
+                for other_idx, other in enumerate(self.matrix)
+                if other_idx != row_idx
+            ):
+                return False
+        return True
 
-        self.latex_current_row_operations = {}
-        self.latex_slide_no = 1
-        self.latex_content = [LaTeX_begin_document]
-        self.latex_previously_formatted_matrix = None
-        return self.new_matrix_get_rows()
+    def reduced_row_echelon_form(self):
+        """Returns the reduced row echelon form of the matrix, as a tuple
+           of rows, and its pivots, as a tuple of (row, column) pairs.
+           Pivots are only sought in the coefficient matrix.
 
-    def new_matrix_get_rows(self):
-        """Command interpreter active when a new matrix is created.
-           Gets the elements of a new matrix, row by row.
+           The result is kept until a row operation changes the matrix,
+           so that it is computed at most once per matrix.
         """
-
-        self.prompt = _("Add matrix line") % self.total_nb_cols
-        while True:
-            done = False
-            command = self.user_input()
-            if row := re.findall(re_fract, command):
-                done = self.new_matrix_add_row(row)
-                if done:
-                    self.prompt = self.default_prompt
-                    return True
-            elif re.search(re_quit, command):
-                self.print_error(_("Data entry stopped."))
-                self.matrix = None
-                self.prompt = self.default_prompt
-                return False
+        if self.rref_cache is not None:
+            return self.rref_cache
+
+        rows = list(self.matrix)
+        pivots = []
+        for col in range(self.nb_cols):
+            row = len(pivots)
+            if row == self.nb_rows:
+                break
+            for pivot_row in range(row, self.nb_rows):
+                if rows[pivot_row][col] != 0:
+                    break
             else:
-                self.print_error(_("Wrong format"))
+                continue
+            rows[row], rows[pivot_row] = rows[pivot_row], rows[row]
+            pivot = rows[row][col]
+            if pivot != 1:
+                rows[row] = self.simplify_row(x / pivot for x in rows[row])
+            for other_row in range(self.nb_rows):
+                factor = rows[other_row][col]
+                if other_row != row and factor != 0:
+                    rows[other_row] = self.simplify_row(
+                        x - factor * y for x, y in zip(rows[other_row], rows[row])
+                    )
+            pivots.append((row, col))
 
-    def new_matrix_add_row(self, row):
-        """Adds a single row of coefficients for a new matrix."""
-        try:
-            row = [Fraction(str(entry)) for entry in row]
-        except Exception:
-            self.print_error(_("Wrong format"))
-            return False
-        if len(row) == self.nb_cols + self.nb_augmented_cols:
-            self.matrix.append(row)
-            if len(self.matrix) == self.nb_requested_rows:
-                self.nb_rows = self.nb_requested_rows
-                return True  # we are done
-        else:
-            self.print_error(_("Wrong number"))
-        return False
+        self.rref_cache = (tuple(rows), tuple(pivots))
+        return self.rref_cache
 
-    def console_print(self):
-        """Prints matrix with columns right-aligned, and some minimal
-           spacing between between each column.
+    def free_columns(self):
+        """Returns the indices of the coefficient matrix columns
+           without a pivot, that is, of the free variables.
         """
+        pivot_cols = {col for _row, col in self.reduced_row_echelon_form()[1]}
+        return [col for col in range(self.nb_cols) if col not in pivot_cols]
 
-        matrix = self.format_matrix()
-        operations = self.format_row_operations()
+    def null_space(self):
+        """Returns a basis of the null space of the coefficient matrix,
+           with one vector per free variable.
+        """
+        rows, pivots = self.reduced_row_echelon_form()
+        zero = to_number(0, self.is_symbolic)
+        basis = []
+        for free_col in self.free_columns():
+            vector = [zero] * self.nb_cols
+            vector[free_col] = to_number(1, self.is_symbolic)
+            for row, col in pivots:
+                vector[col] = -rows[row][free_col]
+            basis.append(tuple(vector))
+        return basis
+
+    def column_space(self):
+        """Returns a basis of the column space of the coefficient matrix
+           as it was first entered: its pivot columns.  Row operations do
+           not change the linear relations between columns, hence the
+           position of the pivots.
+        """
+        return [
+            tuple(row[col] for row in self.initial_matrix)
+            for _row, col in self.reduced_row_echelon_form()[1]
+        ]
+
+    def particular_solution(self, augmented_col=None):
+        """Returns a solution of the system whose right-hand side is
+           the augmented column given, with all free variables equal to 0,
+           or None if there is no solution.
+           If augmented_col is None, the system is homogeneous.
+        """
+        zero = to_number(0, self.is_symbolic)
+        if augmented_col is None:
+            return (zero,) * self.nb_cols
+        rows, pivots = self.reduced_row_echelon_form()
+        col = self.nb_cols + augmented_col
+        if any(row[col] != 0 for row in rows[len(pivots) :]):
+            return None
+        solution = [zero] * self.nb_cols
+        for row, pivot_col in pivots:
+            solution[pivot_col] = rows[row][col]
+        return tuple(solution)
+
+    def hint(self, depth=HINT_DEPTH):
+        """Proposes the next row operation, found by looking up to depth
+           operations ahead.  Returns its operations, as those of a State,
+           or None if the matrix cannot be improved.
+
+           Since the results are kept in a transposition table, asking again
+           for a hint, or coming back to a matrix already seen, does not
+           repeat the search.
+        """
+        if self.is_symbolic:
+            raise RowOperationError("Symbolic hint")
+        if len(self.hint_table) >= HINT_TABLE_SIZE:
+            self.hint_table.clear()
+        hint = self.search_hint(tuple(self.matrix), depth)[1]
+        self.row_features.clear()
+        return hint
+
+    def search_hint(self, rows, depth):
+        """Returns the best score that can be reached from rows, less the
+           cost of the operations, and the first operation to do.
+        """
+        key = (rows, depth)
+        if key in self.hint_table:
+            return self.hint_table[key]
+
+        children = []
+        for operations in self.get_hint_moves(rows):
+            child = list(rows)
+            for operation in operations:
+                self.replay_operation(child, operation)
+            child = tuple(child)
+            children.append((self.get_hint_score(child), operations, child))
+
+        if not children:
+            result = (self.get_hint_score(rows), None)
+        elif depth <= 1:
+            score, operations, _child = max(children, key=lambda child: child[0])
+            result = (score - HINT_STEP_COST, operations)
+        else:
+            # Only the most promising operations are explored further
+            children.sort(key=lambda child: child[0], reverse=True)
+            result = max(
+                (
+                    (self.search_hint(child, depth - 1)[0] - HINT_STEP_COST, operations)
+                    for _score, operations, child in children[:HINT_BEAM]
+                ),
+                key=lambda result: result[0],
+            )
+        self.hint_table[key] = result
+        return result
+
+    def get_row_features(self, row):
+        """Returns the column of the first non-zero element of a row,
+           including the augmented columns as is_reduced_row_echelon_form
+           does, or the number of elements if there is none, the set of
+           columns of its zero elements, and the number of bits of its
+           elements.
+
+           Rows are shared by the matrices compared during the search for
+           hints; their features are thus only computed once.
+        """
+        cached = self.row_features.get(id(row))
+        if cached is not None and cached[0] is row:
+            return cached[1]
+        zeros = {col for col, x in enumerate(row) if x == 0}
+        lead = min(set(range(len(row) + 1)) - zeros)
+        bits = sum(x.numerator.bit_length() + x.denominator.bit_length() for x in row)
+        # The row is kept so that its id cannot be reused by another row
+        self.row_features[id(row)] = (row, (lead, zeros, bits))
+        return lead, zeros, bits
+
+    def get_leading_columns(self, rows):
+        """Returns the column of the first non-zero element of each
+           row, or the number of elements for a row of zeros.
+        """
+        return [self.get_row_features(row)[0] for row in rows]
+
+    def get_hint_moves(self, rows):
+        """Yields the row operations worth considering for a hint:
+           interchanges putting the leading coefficients in order,
+           scalings making them equal to 1, and linear combinations
+           eliminating the coefficients in their column.
+        """
+        leads = self.get_leading_columns(rows)
+        for row_1 in range(self.nb_rows):
+            for row_2 in range(row_1 + 1, self.nb_rows):
+                if leads[row_2] < leads[row_1]:
+                    yield (
+                        RowOperation(row_2, "interchange", row_1, None, None),
+                        RowOperation(row_1, "interchange", row_2, None, None),
+                    )
+        for row, col in enumerate(leads):
+            if col == len(rows[row]):
+                continue
+            pivot = rows[row][col]
+            if pivot != 1:
+                yield (RowOperation(row, "scale", row, None, 1 / pivot),)
+            for target in range(self.nb_rows):
+                if target == row or rows[target][col] == 0:
+                    continue
+                factor = rows[target][col] / pivot
+                op = "-" if factor > 0 else "+"
+                factor = abs(factor)
+                yield (
+                    RowOperation(target, "combo", row, op, None if factor == 1 else factor),
+                )
+
+    def get_hint_score(self, rows):
+        """Scores the progress towards the reduced row echelon form:
+           leading zeros, leading coefficients equal to 1, zeros in their
+           column and rows in order are rewarded, while the size of the
+           numerators and denominators is penalized.
+        """
+        leads, zeros, bits = zip(*(self.get_row_features(row) for row in rows))
+        score = sum(leads)
+        for row, col in enumerate(leads):
+            if col == len(rows[row]):
+                continue
+            if rows[row][col] == 1:
+                score += 1
+            score += sum(col in other_zeros for other_zeros in zeros)
+        score -= sum(
+            1
+            for row_1 in range(self.nb_rows)
+            for row_2 in range(row_1 + 1, self.nb_rows)
+            if leads[row_1] > leads[row_2]
+        )
+        return score - HINT_GROWTH_WEIGHT * sum(bits)
+
+    def scale_row(self, factor, row, target_row=None):
+        """f R_i  -->  R_i
+
+           factor = f
+           row = i
+           target_row, if given, should be equal to row
+
+           Returns the new State.
+        """
+        if target_row is None:
+            target_row = row
+        factor = to_number(factor, self.is_symbolic)
+        self.validate_scale_row(row, target_row, factor)
+
+        self.matrix[row] = self.simplify_row(factor * x for x in self.matrix[row])
+        if self.determinant is not None:
+            self.determinant = self.simplify_row([self.determinant * factor])[0]
+        return self.record([RowOperation(target_row, "scale", row, None, factor)])
+
+    def validate_scale_row(self, row, target_row, factor):
+        """Verifies that parameters in scaling transformation are valid.
+           Raises RowOperationError if they are not.
+        """
+        if row != target_row:
+            raise RowOperationError("Scalar multiplication on same line")
+        if not (0 <= row < self.nb_rows):
+            raise RowOperationError("Row does not exist", row + 1)
+        if factor == 0:
+            raise RowOperationError("Cannot multiply by zero")
+
+    def interchange_rows(self, row_1, row_2):
+        """R_i <--> R_j
+
+           row_1 = i
+           row_2 = j
+
+           Returns the new State.
+        """
+        self.validate_interchange_rows(row_1, row_2)
+
+        self.matrix[row_1], self.matrix[row_2] = self.matrix[row_2], self.matrix[row_1]
+        if self.determinant is not None:
+            self.determinant = -self.determinant
+        return self.record(
+            [
+                RowOperation(row_2, "interchange", row_1, None, None),
+                RowOperation(row_1, "interchange", row_2, None, None),
+            ]
+        )
+
+    def validate_interchange_rows(self, row_1, row_2):
+        """Verifies that parameters in row exchange transformation are valid.
+           Raises RowOperationError if they are not.
+        """
+        if row_1 == row_2:
+            raise RowOperationError("No effect")
+        if not (0 <= row_1 < self.nb_rows):
+            raise RowOperationError("Row does not exist", row_1 + 1)
+        if not (0 <= row_2 < self.nb_rows):
+            raise RowOperationError("Row does not exist", row_2 + 1)
+
+    def pivot(self, row, col):
+        """pivot i, j
+
+           Scales row i so that its element in column j is 1, then
+           eliminates all the other elements of column j.  This is done
+           as a single step, combining a scaling and linear combinations.
+
+           Returns the new State, with one operation per changed row.
+        """
+        self.validate_pivot(row, col)
+
+        # The operations below are logged together, as a single step
+        log, self.log = self.log, []
+        operations = []
+        pivot = self.matrix[row][col]
+        if pivot != 1:
+            operations += self.scale_row(1 / pivot, row).operations
+
+        for other_row in range(self.nb_rows):
+            factor = self.matrix[other_row][col]
+            if other_row == row or factor == 0:
+                continue
+            op = "-"
+            if is_negative(factor):
+                op, factor = "+", -factor
+            if factor == 1:
+                state = self.linear_combo_1(other_row, op, row)
+            else:
+                state = self.linear_combo_2(other_row, op, factor, row)
+            operations += state.operations
+        self.log = log
+        return self.record(operations)
+
+    def validate_pivot(self, row, col):
+        """Verifies that parameters in pivot operation are valid.
+           Raises RowOperationError if they are not.
+        """
+        if not (0 <= row < self.nb_rows):
+            raise RowOperationError("Row does not exist", row + 1)
+        if not (0 <= col < self.nb_cols):
+            raise RowOperationError("Column does not exist", col + 1)
+        if self.matrix[row][col] == 0:
+            raise RowOperationError("Pivot cannot be zero")
+        if self.matrix[row][col] == 1 and all(
+            other[col] == 0
+            for other_idx, other in enumerate(self.matrix)
+            if other_idx != row
+        ):
+            raise RowOperationError("No effect")
+
+    def linear_combo_1(self, row_1, op, row_2, target_row=None):
+        """R_i +/- R_j --> R_i
+
+           row_1 = i
+           op = +/-
+           row_2 = j
+           target_row, if given, should be the same as row_1
+
+           Returns the new State.
+        """
+        if target_row is None:
+            target_row = row_1
+        self.validate_linear_combo_1(row_1, row_2, target_row)
+
+        pm = 1 if op == "+" else -1
+        self.matrix[row_1] = self.simplify_row(
+            x + pm * y for x, y in zip(self.matrix[row_1], self.matrix[row_2])
+        )
+        return self.record([RowOperation(target_row, "combo", row_2, op, None)])
+
+    def validate_linear_combo_1(self, row_1, row_2, target_row):
+        """Verifies that parameters in linear combination '1' are valid.
+           Raises RowOperationError if they are not.
+        """
+        if not (0 <= row_1 < self.nb_rows):
+            raise RowOperationError("Row does not exist", row_1 + 1)
+        if not (0 <= row_2 < self.nb_rows):
+            raise RowOperationError("Row does not exist", row_2 + 1)
+        if row_1 != target_row:
+            raise RowOperationError("Must be the same line")
+        if row_1 == row_2:
+            raise RowOperationError("Cannot use a single line")
+
+    def linear_combo_2(self, row_1, op, factor, row_2, target_row=None):
+        """R_i  +/- f R_j -->  R_i
+
+           row_1 = i
+           op = +/-
+           factor = f
+           row_2 = j
+           target_row, if given, should be the same as row_1
+
+           Returns the new State.
+        """
+        if target_row is None:
+            target_row = row_1
+        factor = to_number(factor, self.is_symbolic)
+        self.validate_linear_combo_2(row_1, row_2, target_row, factor)
+
+        pm = 1 if op == "+" else -1
+        self.matrix[row_1] = self.simplify_row(
+            x + factor * pm * y for x, y in zip(self.matrix[row_1], self.matrix[row_2])
+        )
+        return self.record([RowOperation(target_row, "combo", row_2, op, factor)])
+
+    def validate_linear_combo_2(self, row_1, row_2, target_row, factor):
+        """Verifies that parameters in linear combination '2' are valid.
+           Raises RowOperationError if they are not.
+        """
+        self.validate_linear_combo_1(row_1, row_2, target_row)
+        if factor == 0:
+            raise RowOperationError("No effect")
+
+
+# ===============================================
+# Incremental display using ANSI escape sequences
+# ===============================================
+
+CSI = "\x1b["  # Control Sequence Introducer
+
+
+class OutputCounter:
+    """Wraps the file used by the console, counting the bytes
+       and the lines written.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.nb_bytes = 0
+        self.nb_lines = 0
+
+    def write(self, text):
+        self.nb_bytes += len(text.encode("utf8"))
+        self.nb_lines += text.count("\n")
+        return self.file.write(text)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+class DiffRenderer:
+    """Shows successive frames, such as the previous matrix, the row
+       operations and the new matrix, at the same place on the screen.
+
+       The previous frame is kept, and only the characters that differ
+       from it are written, using ANSI escape sequences to move the cursor.
+       The lines written below the frame since it was shown, including the
+       commands entered, are erased.  If the previous frame is no longer
+       entirely on the screen, or if the number of lines has changed,
+       the new frame is written in full.
+    """
+
+    def __init__(self, output):
+        self.output = output  # an OutputCounter
+        self.previous_lines = None
+        self.end_line = 0  # value of output.nb_lines just after the frame
+
+    def render(self, console, renderables):
+        """Shows a frame made of the renderables, one below the other."""
+        lines = []
+        for renderable in renderables:
+            lines += [
+                self.get_cells(line)
+                for line in console.render_lines(renderable, pad=False)
+            ]
+        nb_lines_below = self.output.nb_lines - self.end_line
+        if (
+            self.previous_lines is None
+            or len(lines) != len(self.previous_lines)
+            or not console.is_terminal
+            or len(lines) + nb_lines_below >= console.height
+        ):
+            text = "".join(self.to_ansi(console, line) + "\n" for line in lines)
+        else:
+            text = self.get_changes(console, lines, nb_lines_below)
+        self.output.write(text)
+        self.output.flush()
+        self.previous_lines = lines
+        self.end_line = self.output.nb_lines
+
+    @staticmethod
+    def get_cells(line):
+        """Splits a line of Rich segments into (character, style) cells."""
+        return [
+            (char, segment.style)
+            for segment in line
+            if not segment.control
+            for char in segment.text
+        ]
+
+    @staticmethod
+    def to_ansi(console, cells):
+        """Converts cells into text including the ANSI style codes."""
+        segments = []
+        for char, style in cells:
+            if segments and segments[-1].style == style:
+                segments[-1] = Segment(segments[-1].text + char, style)
+            else:
+                segments.append(Segment(char, style))
+        with console.capture() as capture:
+            console.print(Segments(segments), end="")
+        return capture.get()
+
+    def get_changes(self, console, lines, nb_lines_below):
+        """Returns the text updating the previous frame, moving the
+           cursor only to the cells that have changed.
+        """
+        # From the start of the line below the frame, go to its first line
+        changes = ["\r", CSI + "%dA" % (len(lines) + nb_lines_below)]
+        current_line = 0
+        for line_idx, (old, new) in enumerate(zip(self.previous_lines, lines)):
+            if old == new:
+                continue
+            start = 0
+            while start < min(len(old), len(new)) and old[start] == new[start]:
+                start += 1
+            end = len(new)
+            if len(old) == len(new):
+                while end > start and old[end - 1] == new[end - 1]:
+                    end -= 1
+            if line_idx > current_line:
+                changes.append(CSI + "%dB" % (line_idx - current_line))
+                current_line = line_idx
+            changes.append(CSI + "%dG" % (start + 1))
+            changes.append(self.to_ansi(console, new[start:end]))
+            if len(new) < len(old):
+                changes.append(CSI + "K")  # erase the end of the line
+        # Back below the frame, erasing everything that follows
+        changes.append(CSI + "%dB\r" % (len(lines) - current_line))
+        changes.append(CSI + "J")
+        return "".join(changes)
+
+
+def benchmark_display(size=8, seed=0):
+    """Compares the number of bytes written for each step of the
+       Gauss-Jordan algorithm, applied to a random square matrix
+       of integers, when frames are printed in full and when only
+       the changes are written.
+    """
+    import random
+
+    random.seed(seed)
+    rows = [[random.randint(-9, 9) for col in range(size)] for row in range(size)]
+    assistants = []
+    for renderer in (False, True):
+        assistant = Assistant(interactive=False)
+        assistant.set_output(
+            io.StringIO(), force_terminal=True, width=200, height=4 * size + 10
+        )
+        if renderer:
+            assistant.renderer = DiffRenderer(assistant.output)
+        assistant.new_matrix(size, size, rows=rows)
+        assistant.console_print()
+        assistants.append(assistant)
+
+    results = Table(_("Step"), "", _("Full frames"), _("Changes only"))
+    totals = [0, 0]
+
+    def run(command):
+        sizes = []
+        for idx, assistant in enumerate(assistants):
+            nb_bytes = assistant.output.nb_bytes
+            assistant.process(command)
+            sizes.append(assistant.output.nb_bytes - nb_bytes)
+            totals[idx] += sizes[-1]
+        results.add_row(str(len(results.rows) + 1), command, *map(str, sizes))
+
+    engine = assistants[0].engine
+    R = _("R_or_L")
+    for col in range(size):
+        pivot_row = next(
+            (row for row in range(col, size) if engine.matrix[row][col] != 0), None
+        )
+        if pivot_row is None:
+            continue
+        if pivot_row != col:
+            run(f"{R}_{col + 1} <--> {R}_{pivot_row + 1}")
+        pivot = engine.matrix[col][col]
+        if pivot != 1:
+            run(f"{1 / pivot} {R}_{col + 1} --> {R}_{col + 1}")
+        for row in range(size):
+            factor = engine.matrix[row][col]
+            if row != col and factor != 0:
+                op = "-" if factor > 0 else "+"
+                run(f"{R}_{row + 1} {op} {abs(factor)} {R}_{col + 1} --> {R}_{row + 1}")
+    results.add_row("", "Total", *map(str, totals))
+    return results
+
+
+# ===============================================
+# The main code (console interface)
+# ===============================================
+
+
+RIGHT_ARROW = "-->"  # used in printing row operations
+
+
+class Assistant:
+    """Enables user-driven live demonstration of Gauss-Jordan algorithm."""
+
+    def __init__(self, interactive=True, lang=None):
+        self.prompt = self.default_prompt = "> "
+        self.theme = dark_background_theme
+        # Each assistant has its own language, LANG by default
+        self.lang = LANG if lang is None else lang
+        # With a DiffRenderer, only the changes to the matrices are written
+        self.renderer = None
+        self.set_output(sys.stdout)
+        self.interactive = interactive
+        # Set when the lines entered are data, such as matrix rows,
+        # instead of commands.
+        self.input_handler = None
+        # Local files can be read and written; this is not the case
+        # for the sessions of a server.
+        self.local_files = True
+        self.engine = None
+        self.current_row_operations = {}
+        self.symbolic_mode = False
+        self.growth_threshold = None
+        # Size of the viewport window; 0 means that the entire
+        # matrix is shown.
+        self.view_nb_rows = 0
+        self.view_nb_cols = 0
+        if interactive:
+            self.console.print("lang =", self.lang)
+            self.interact()
+
+    def set_output(self, file, **console_options):
+        """Sets the file, and the options, used by the console."""
+        self.output = OutputCounter(file)
+        self.console_options = console_options
+        self.console = Console(theme=self.theme, file=self.output, **console_options)
+        if self.renderer is not None:
+            self.renderer = DiffRenderer(self.output)
+
+    def __getstate__(self):
+        """Returns the state to be saved, for example in a session snapshot,
+           without the console and the formatted matrices shown.
+        """
+        state = dict(self.__dict__)
+        for name in ("output", "console", "previously_formatted_matrix"):
+            state.pop(name, None)
+        state["renderer"] = self.renderer is not None
+        return state
+
+    def __setstate__(self, state):
+        """Restores a saved state; set_output must then be called."""
+        self.__dict__.update(state)
+        self.renderer = DiffRenderer(None) if state["renderer"] else None
+        if self.matrix is not None:
+            self.previously_formatted_matrix = self.format_matrix()
+
+    @property
+    def matrix(self):
+        """The current matrix, as a list of rows, or None."""
+        if self.engine is None:
+            return None
+        return self.engine.matrix
+
+    def interact(self):
+        """Command interpreter"""
+        while True:
+            command = self.user_input()
+
+            if re.search(re_quit, command):
+                break
+
+            self.process(command)
+
+    def process(self, command):
+        """Executes a single command, or enters a line of data,
+           showing the matrix if it has changed.
+        """
+        if self.input_handler is not None:
+            result = self.input_handler(command)
+        else:
+            result = self.parse(command)
+
+        if result and self.matrix is not None:
+            self.console_print()
+            self.update_growth()
+            self.step_row_names.append(_("R_or_L", self.lang))
+            self.current_row_operations.clear()
+
+    def parse(self, command):
+        """Parses command controlling the information displayed.
+           To show the latest matrix update, an operation must return True.
+        """
+        lowercase = command.lower()
+
+        if lowercase in ["colors", "colours", "couleurs"]:
+            if self.theme == dark_background_theme:
+                self.theme = light_background_theme
+            else:
+                self.theme = dark_background_theme
+            self.console = Console(
+                theme=self.theme, file=self.output, **self.console_options
+            )
+            if self.lang == "en":
+                self.console.print(theme_demo_en)
+            else:
+                self.console.print(theme_demo_fr)
+
+        elif lowercase in ["en", "fr"]:
+            if lowercase == self.lang:
+                self.console.print(_("No effect", self.lang))
+            else:
+                self.lang = lowercase
+                self.console.print("lang =", self.lang)
+
+        elif command.lower() == "latex":
+            self.save_latex()
+
+        elif op := re.search(re_display, command):
+            self.set_renderer(DISPLAY_MODES[op.group(1).lower()])
+
+        elif op := re.search(re_growth, command):
+            self.growth(op.group(1))
+
+        elif re.search(re_symbolic, command):
+            self.toggle_symbolic_mode()
+
+        elif re.search(re_det, command):
+            self.show_determinant()
+
+        elif op := re.search(re_inverse, command):
+            return self.inverse(int(op.group(1)) if op.group(1) else None)
+
+        elif re.search(re_hint, command):
+            self.show_hint()
+
+        elif re.search(re_solution, command):
+            self.show_solution()
+
+        elif re.search(re_nullspace, command):
+            self.show_null_space()
+
+        elif re.search(re_colspace, command):
+            self.show_column_space()
+
+        elif op := re.search(re_rhs_add, command):
+            self.add_right_hand_side(op.group(1))
+
+        elif op := re.search(re_solve_rhs, command):
+            self.solve_right_hand_sides(show_steps=bool(op.group(1)))
+
+        elif op := re.search(re_view, command):
+            self.set_viewport(int(op.group(1)), int(op.group(2)))
+
+        elif re.search(re_view_off, command):
+            self.set_viewport(0, 0)
+
+        elif op := re.search(re_scroll, command):
+            steps = int(op.group(2)) if op.group(2) else 1
+            self.scroll(op.group(1).lower(), steps)
+
+        elif re.search(re_help, command):
+            self.console.print(Markdown(_("help", self.lang)), "\n")
+
+        elif op := re.search(re_mat, command):
+            return self.new_matrix(int(op.group(1)), int(op.group(2)))
+
+        elif op := re.search(re_aug_mat, command):
+            return self.new_matrix(int(op.group(1)), int(op.group(2)), int(op.group(3)))
+
+        elif op := re.search(re_load, command):
+            return self.load_matrix(
+                op.group(1), int(op.group(2)) if op.group(2) else None
+            )
+
+        elif op := re.search(re_paste, command):
+            return self.paste_matrix(int(op.group(1)) if op.group(1) else None)
+
+        else:
+            return self.apply_row_operation(command)
+
+    def apply_row_operation(self, command):
+        """Performs an elementary row operation using the engine, and
+           describes the changes made to each row.
+           Returns True if the operation could be performed.
+        """
+        try:
+            name, args = parse_row_operation(command)
+            if self.engine is None:
+                raise RowOperationError("No matrix")
+            state = getattr(self.engine, name)(*args)
+        except RowOperationError as error:
+            self.print_error(error.message(self.lang))
+            self.current_row_operations.clear()
+            return False
+
+        for operation in state.operations:
+            self.describe_row_operation(operation)
+        return True
+
+    def describe_row_operation(self, operation):
+        """Describes a row operation, for the console, next to the row
+           it changes.
+        """
+        R = _("R_or_L", self.lang)
+        target = operation.target + 1
+        row = operation.row + 1
+        if operation.kind == "interchange":
+            self.current_row_operations[
+                operation.target
+            ] = f"{R}_{row} {RIGHT_ARROW} {R}_{target}"
+        elif operation.kind == "scale":
+            factor = self.format_factor(operation.factor)
+            self.current_row_operations[
+                operation.target
+            ] = f"{factor} [same_row]{R}_{row}[/same_row] {RIGHT_ARROW} [same_row]{R}_{row}[/same_row]"
+        else:
+            op = operation.op
+            if operation.factor is None:
+                factor = ""
+            else:
+                factor = " " + self.format_factor(operation.factor)
+            self.current_row_operations[
+                operation.target
+            ] = f"[same_row]{R}_{target}[/same_row] {op}{factor} {R}_{row} {RIGHT_ARROW} [same_row]{R}_{target}[/same_row]"
+
+    def latex_describe_row_operation(self, operation, R):
+        """Describes a row operation for LaTeX, next to the row it changes;
+           R is the letter used for rows.
+        """
+        target = operation.target + 1
+        row = operation.row + 1
+        if operation.kind == "interchange":
+            return "\\scriptstyle " + f"{R}_{row} \\longrightarrow {R}_{target} \\\\"
+        elif operation.kind == "scale":
+            factor = self.format_factor(operation.factor, latex=True)
+            return (
+                "\\scriptstyle " + f"{factor}{R}_{row} \\longrightarrow {R}_{row} \\\\"
+            )
+        else:
+            op = operation.op
+            if operation.factor is None:
+                factor = ""
+            else:
+                factor = " " + self.format_factor(operation.factor, latex=True)
+            return (
+                "\\scriptstyle "
+                + f"{R}_{target}{op}{factor} {R}_{row} \\longrightarrow {R}_{target} \\\\"
+            )
+
+    def toggle_symbolic_mode(self):
+        """Enables or disables the symbolic mode, used for new matrices.
+
+           SymPy evaluates the expressions it parses: the symbolic mode is
+           thus not available in remote sessions.
+        """
+        if not self.local_files:
+            self.print_error(_("Local files only", self.lang))
+        elif self.symbolic_mode:
+            self.symbolic_mode = False
+            self.console.print(_("Symbolic off", self.lang), "\n")
+        elif import_sympy():
+            self.symbolic_mode = True
+            self.console.print(_("Symbolic on", self.lang), "\n")
+        else:
+            self.print_error(_("SymPy required", self.lang))
+
+    def new_matrix(
+        self, nb_rows, nb_cols, nb_augmented_cols=0, identity=False, rows=None
+    ):
+        """Sets the parameters for a new matrix.
+
+        This is called after a command like
+
+            mat m x n
+            mat m x n | p
+
+        If identity is True, the augmented columns are not entered by
+        the user but are those of the identity matrix.
+        If rows is None, the elements of the matrix are entered row by row
+        by the user.
+        """
+        self.engine = None
+        self.entered_rows = []
+        self.is_symbolic = self.symbolic_mode
+        self.augment_with_identity = identity
+        self.row_growth = None
+        self.growth_history = []
+        # Letter used for rows at each step, in the language then active
+        self.step_row_names = []
+        self.right_hand_sides = []
+        self.previously_formatted_matrix = None
+        self.nb_requested_rows = nb_rows
+        self.nb_rows = 0
+        self.nb_cols = nb_cols
+        self.nb_augmented_cols = nb_augmented_cols
+        self.total_nb_cols = nb_cols + nb_augmented_cols
+        self.current_row_operations = {}
+        self.view_top = 0
+        self.view_left = 0
+        self.previous_matrix = None
+        self.previous_window = None
+
+        if rows is None:
+            return self.new_matrix_get_rows()
+        for row in rows:
+            done = self.new_matrix_add_row(row)
+        return done
+
+    def new_matrix_get_rows(self):
+        """Gets the elements of a new matrix, row by row."""
+        self.prompt = _("Add matrix line", self.lang) % self.get_nb_entered_cols()
+        self.input_handler = self.new_matrix_read_row
+        return self.read_input()
+
+    def new_matrix_read_row(self, command):
+        """Reads a row of a new matrix.
+           Returns True when all the rows have been entered.
+        """
+        if re.search(re_quit, command):
+            self.print_error(_("Data entry stopped.", self.lang))
+            self.end_input()
+            return False
+        if self.is_symbolic:
+            row = self.split_symbolic_row(command)
+        else:
+            row = re.findall(re_fract, command)
+        if row:
+            if self.new_matrix_add_row(row):
+                self.end_input()
+                return True
+        else:
+            self.print_error(_("Wrong format", self.lang))
+        return False
+
+    def read_input(self):
+        """Command interpreter active while data is entered: each line
+           is given to the input handler, until the data entry ends.
+           Returns the value returned by the input handler for the last line.
+
+           When not interactive, lines are instead given one at a time
+           to process(), and False is returned right away.
+        """
+        result = False
+        while self.interactive and self.input_handler is not None:
+            result = self.input_handler(self.user_input())
+        return result
+
+    def end_input(self):
+        """Ends the data entry, going back to commands."""
+        self.input_handler = None
+        self.prompt = self.default_prompt
+
+    @staticmethod
+    def split_symbolic_row(line):
+        """Splits a row of symbolic matrix elements, separated by commas
+           or semicolons if there are any, and by spaces otherwise.
+        """
+        if "," in line or ";" in line:
+            return [entry.strip() for entry in re.split("[,;]", line) if entry.strip()]
+        return line.split()
+
+    def new_matrix_add_row(self, row):
+        """Adds a single row of coefficients for a new matrix."""
+        try:
+            row = [to_number(entry, self.is_symbolic) for entry in row]
+        except RowOperationError:
+            self.print_error(_("Wrong format", self.lang))
+            return False
+        if len(row) == self.get_nb_entered_cols():
+            if self.augment_with_identity:
+                row += [
+                    to_number(int(len(self.entered_rows) == col), self.is_symbolic)
+                    for col in range(self.nb_cols)
+                ]
+            self.entered_rows.append(row)
+            if len(self.entered_rows) == self.nb_requested_rows:
+                self.nb_rows = self.nb_requested_rows
+                self.engine = Engine(
+                    self.entered_rows, self.nb_augmented_cols, self.is_symbolic
+                )
+                return True  # we are done
+        else:
+            self.print_error(_("Wrong number", self.lang))
+        return False
+
+    def load_matrix(self, filename, nb_augmented_cols=None):
+        """Creates a new matrix from a CSV or MatrixMarket file.
+
+        This is called after a command like
+
+            load matrix.csv
+            load matrix.mtx | p
+
+        Returns True if a new matrix has been created.
+        """
+        if not self.local_files:
+            self.print_error(_("Local files only", self.lang))
+            return False
+        if not filename:
+            import tkinter
+            from tkinter import filedialog
+
+            app = tkinter.Tk()
+            try:
+                filename = filedialog.askopenfilename(
+                    filetypes=(
+                        ("CSV", "*.csv"),
+                        ("MatrixMarket", "*.mtx"),
+                        ("*", "*.*"),
+                    )
+                )
+            except FileNotFoundError:
+                pass
+            app.destroy()
+            if not filename:
+                return False
+
+        try:
+            parsed = read_matrix_file(filename, self.lang)
+        except (OSError, UnicodeDecodeError):
+            self.print_error(_("Cannot read file", self.lang) % filename)
+            return False
+        return self.new_matrix_from_parsed_rows(*parsed, nb_augmented_cols)
+
+    def paste_matrix(self, nb_augmented_cols=None):
+        """Creates a new matrix from rows pasted by the user, all at once.
+
+        This is called after a command like
+
+            paste
+            paste | p
+
+        Returns True if a new matrix has been created.
+        """
+        self.console.print(_("Paste rows", self.lang))
+        self.prompt = ""
+        self.pasted_lines = []
+        self.pasted_augmented_cols = nb_augmented_cols
+        self.input_handler = self.paste_matrix_read_line
+        return self.read_input()
+
+    def paste_matrix_read_line(self, line):
+        """Reads a pasted line; an empty line ends the matrix.
+           Returns True if a new matrix has been created.
+        """
+        if re.search(re_quit, line):
+            self.print_error(_("Data entry stopped.", self.lang))
+            self.end_input()
+            return False
+        if line.strip():
+            self.pasted_lines.append(line)
+            return False
+        self.end_input()
+        return self.new_matrix_from_parsed_rows(
+            *parse_rows(self.pasted_lines, self.lang), self.pasted_augmented_cols
+        )
+
+    def new_matrix_from_parsed_rows(
+        self, rows, parsed_augmented_cols, errors, nb_augmented_cols=None
+    ):
+        """Creates a new matrix from the result of parse_rows or
+           parse_matrix_market, unless errors were found.
+           The number of augmented columns given by the user, if any,
+           has priority over the one found in the data.
+        """
+        if errors:
+            self.print_errors([_("Load errors", self.lang) % len(errors)] + errors)
+            return False
+        if nb_augmented_cols is None:
+            nb_augmented_cols = parsed_augmented_cols
+        total_nb_cols = len(rows[0])
+        if nb_augmented_cols >= total_nb_cols:
+            self.print_error(_("Too many augmented columns", self.lang))
+            return False
+        return self.new_matrix(
+            len(rows), total_nb_cols - nb_augmented_cols, nb_augmented_cols, rows=rows
+        )
+
+    @staticmethod
+    def get_entry_growth(entry):
+        """Returns the number of bits of the numerator and of the
+           denominator of a matrix element, and its size in bytes.
+        """
+        if isinstance(entry, Fraction):
+            num, den = entry.numerator, entry.denominator
+        elif entry.is_Rational:
+            num, den = entry.p, entry.q
+        else:
+            return 0, 0, sys.getsizeof(entry)
+        size = sys.getsizeof(entry) + sys.getsizeof(num) + sys.getsizeof(den)
+        return num.bit_length(), den.bit_length(), size
+
+    def get_row_growth(self, row):
+        """Returns the maximum number of bits of the numerators and of
+           the denominators in a row, and the total size of its elements.
+        """
+        num_bits = den_bits = size = 0
+        for entry in row:
+            entry_num_bits, entry_den_bits, entry_size = self.get_entry_growth(entry)
+            num_bits = max(num_bits, entry_num_bits)
+            den_bits = max(den_bits, entry_den_bits)
+            size += entry_size
+        return num_bits, den_bits, size
+
+    def update_growth(self):
+        """Records the size of the matrix elements after a new matrix is
+           created or after a row operation. Only the rows changed by
+           the last row operation are measured again.
+        """
+        if self.row_growth is None:
+            self.row_growth = [self.get_row_growth(row) for row in self.matrix]
+        else:
+            for row_idx in self.current_row_operations:
+                self.row_growth[row_idx] = self.get_row_growth(self.matrix[row_idx])
+
+        num_bits = max(row[0] for row in self.row_growth)
+        den_bits = max(row[1] for row in self.row_growth)
+        size = sum(row[2] for row in self.row_growth) + sys.getsizeof(self.matrix)
+        self.growth_history.append((num_bits, den_bits, size))
+
+        if self.growth_threshold is not None and (
+            max(num_bits, den_bits) > self.growth_threshold
+        ):
+            self.console.print(
+                "[error]" + _("Growth warning", self.lang) % max(num_bits, den_bits)
+            )
+            self.console.print()
+
+    def growth(self, threshold):
+        """Sets the warning threshold, if given, or shows the size of the
+           matrix elements after each step.
+
+        This is called after a command like
+
+            growth
+            growth n
+            growth off
+        """
+        if threshold is not None:
+            if threshold.lower() == "off":
+                self.growth_threshold = None
+            else:
+                self.growth_threshold = int(threshold)
+            threshold = "-" if self.growth_threshold is None else self.growth_threshold
+            self.console.print(_("Growth threshold", self.lang) % threshold, "\n")
+            return
+
+        if self.matrix is None or not self.growth_history:
+            self.print_error(_("No matrix", self.lang))
+            return
+
+        table = Table(
+            _("Step", self.lang),
+            _("Numerator bits", self.lang),
+            _("Denominator bits", self.lang),
+            _("Size (bytes)", self.lang),
+        )
+        for step, (num_bits, den_bits, size) in enumerate(self.growth_history):
+            table.add_row(str(step), str(num_bits), str(den_bits), str(size))
+        self.console.print(table)
+
+    def get_nb_entered_cols(self):
+        """Number of matrix elements that must be entered for each row."""
+        if self.augment_with_identity:
+            return self.nb_cols
+        return self.total_nb_cols
+
+    def inverse(self, size=None):
+        """Creates a square matrix augmented with the identity matrix.
+
+        This is called after a command like
+
+            inverse n
+
+        or, to use the current coefficient matrix,
+
+            inverse
+
+        Returns True if a new matrix has been created.
+        """
+        if size is not None:
+            return self.new_matrix(size, size, size, identity=True)
+        if self.matrix is None or not self.nb_rows:
+            self.print_error(_("No matrix", self.lang))
+            return False
+        if self.nb_rows != self.nb_cols:
+            self.print_error(_("Square matrix required", self.lang))
+            return False
+        rows = [row[: self.nb_cols] for row in self.matrix]
+        return self.new_matrix(self.nb_rows, self.nb_cols, self.nb_cols, True, rows)
+
+    def show_determinant(self):
+        """Shows the determinant of the current coefficient matrix."""
+        if self.matrix is None or not self.nb_rows:
+            self.print_error(_("No matrix", self.lang))
+        elif self.engine.determinant is None:
+            self.print_error(_("Square matrix required", self.lang))
+        else:
+            self.console.print(
+                _("Determinant", self.lang) % self.engine.determinant, "\n"
+            )
+
+    def show_hint(self):
+        """Proposes the next row operation, and shows its effect
+           without changing the matrix.
+        """
+        if self.matrix is None or not self.nb_rows:
+            self.print_error(_("No matrix", self.lang))
+            return
+        if self.engine.is_reduced_row_echelon_form():
+            self.console.print(_("Already reduced", self.lang), "\n")
+            return
+        try:
+            operations = self.engine.hint()
+        except RowOperationError as error:
+            self.print_error(error.message(self.lang))
+            return
+        if operations is None:
+            self.console.print(_("Already reduced", self.lang), "\n")
+            return
+
+        matrix = list(self.matrix)
+        for operation in operations:
+            self.engine.replay_operation(matrix, operation)
+            self.describe_row_operation(operation)
+        self.console.print(_("Hint", self.lang) % self.format_command(operations))
+        display = Table("", "", "").grid()
+        display.add_row(
+            self.format_matrix(), self.format_row_operations(), self.format_matrix(matrix)
+        )
+        self.console.print(display)
+        self.current_row_operations.clear()
+
+    def format_command(self, operations):
+        """Formats the operations of a hint, which are those of a single
+           interchange, scaling or linear combination, as the command
+           that the user would enter.
+        """
+        R = _("R_or_L", self.lang)
+        operation = operations[0]
+        target = operation.target + 1
+        row = operation.row + 1
+        if operation.kind == "interchange":
+            return f"{R}_{min(target, row)} <--> {R}_{max(target, row)}"
+        if operation.kind == "scale":
+            return f"{self.format_factor(operation.factor)} {R}_{row} --> {R}_{row}"
+        factor = ""
+        if operation.factor is not None:
+            factor = self.format_factor(operation.factor) + " "
+        return f"{R}_{target} {operation.op} {factor}{R}_{row} --> {R}_{target}"
+
+    def show_solution(self):
+        """Shows the solution of the system for each augmented column,
+           writing each basic variable in terms of the free variables.
+           Without augmented columns, the system is homogeneous.
+        """
+        if self.matrix is None or not self.nb_rows:
+            self.print_error(_("No matrix", self.lang))
+            return
+        free_cols = self.engine.free_columns()
+        basis = self.engine.null_space()
+        augmented_cols = range(self.nb_augmented_cols) or [None]
+        for augmented_col in augmented_cols:
+            if len(augmented_cols) > 1:
+                self.console.print(
+                    _("Right-hand side", self.lang) % (augmented_col + 1)
+                )
+            solution = self.engine.particular_solution(augmented_col)
+            if solution is None:
+                self.console.print(_("No solution", self.lang), "\n")
+                continue
+            lines = []
+            for col in range(self.nb_cols):
+                if col in free_cols:
+                    lines.append(_("Free variable", self.lang) % (col + 1))
+                    continue
+                terms = [
+                    (vector[col], f"x_{free_col + 1}")
+                    for free_col, vector in zip(free_cols, basis)
+                ]
+                lines.append(
+                    f"x_{col + 1} = "
+                    + self.format_linear_combination(solution[col], terms)
+                )
+            self.console.print("\n".join(lines), "\n")
+
+    def show_null_space(self):
+        """Shows a basis of the null space of the coefficient matrix."""
+        if self.matrix is None or not self.nb_rows:
+            self.print_error(_("No matrix", self.lang))
+            return
+        basis = self.engine.null_space()
+        if not basis:
+            self.console.print(_("Null space zero", self.lang), "\n")
+            return
+        self.console.print(_("Null space basis", self.lang))
+        self.console.print(self.format_vectors(basis))
+
+    def show_column_space(self):
+        """Shows a basis of the column space of the coefficient matrix."""
+        if self.matrix is None or not self.nb_rows:
+            self.print_error(_("No matrix", self.lang))
+            return
+        basis = self.engine.column_space()
+        if not basis:
+            self.console.print(_("Column space zero", self.lang), "\n")
+            return
+        self.console.print(_("Column space basis", self.lang))
+        self.console.print(self.format_vectors(basis))
+
+    def add_right_hand_side(self, entries):
+        """Adds a right-hand side, with one element per row, to be solved
+           later using the row operations done on the matrix.
+
+        This is called after a command like
+
+            rhs add 1 2 3
+        """
+        if self.matrix is None or not self.nb_rows:
+            self.print_error(_("No matrix", self.lang))
+            return
+        if self.is_symbolic:
+            entries = self.split_symbolic_row(entries)
+        else:
+            entries = re.findall(re_fract, entries)
+        try:
+            column = [to_number(entry, self.is_symbolic) for entry in entries]
+        except RowOperationError:
+            self.print_error(_("Wrong format", self.lang))
+            return
+        if len(column) != self.nb_rows:
+            self.print_error(_("Wrong number", self.lang))
+            return
+        self.right_hand_sides.append(column)
+        self.console.print(_("RHS added", self.lang) % len(self.right_hand_sides), "\n")
+
+    def solve_right_hand_sides(self, show_steps=False):
+        """Applies the row operations done so far to each added right-hand
+           side, and shows them next to the coefficient matrix.
+
+        This is called after a command like
+
+            solve rhs
+            solve rhs steps
+
+        The elimination is not redone: the operations logged by the engine
+        are replayed on the right-hand sides only, which requires a time
+        proportional to the number of matrix rows for each operation.
+        With show_steps, the coefficient matrix is also shown at each step.
+        """
+        if self.matrix is None or not self.nb_rows:
+            self.print_error(_("No matrix", self.lang))
+            return
+        if not self.right_hand_sides:
+            self.print_error(_("No RHS", self.lang))
+            return
+
+        columns = [
+            tuple(rhs[row_idx] for rhs in self.right_hand_sides)
+            for row_idx in range(self.nb_rows)
+        ]
+        initial_matrix = [
+            row[: self.nb_cols] + column
+            for row, column in zip(self.engine.initial_matrix, columns)
+        ]
+        formatted_initial_matrix = self.format_matrix(initial_matrix)
+        if not show_steps:
+            for _operations, columns in self.engine.replay(columns):
+                pass
+            matrix = [
+                row[: self.nb_cols] + column
+                for row, column in zip(self.matrix, columns)
+            ]
+            display = Table("", "", "").grid(padding=(0, 1))
+            display.add_row(
+                formatted_initial_matrix, RIGHT_ARROW, self.format_matrix(matrix)
+            )
+            self.console.print(display)
+            return
+
+        self.console.print(formatted_initial_matrix)
+        previously_formatted_matrix = formatted_initial_matrix
+        for operations, matrix in self.engine.replay(initial_matrix):
+            for operation in operations:
+                self.describe_row_operation(operation)
+            formatted_matrix = self.format_matrix(matrix)
+            display = Table("", "", "").grid()
+            display.add_row(
+                previously_formatted_matrix,
+                self.format_row_operations(),
+                formatted_matrix,
+            )
+            self.console.print(display)
+            previously_formatted_matrix = formatted_matrix
+            self.current_row_operations.clear()
+
+    def console_print(self):
+        """Prints matrix with columns right-aligned, and some minimal
+           spacing between between each column.
+        """
+
+        self.follow_row_operations()
+        matrix = self.format_matrix()
+        operations = self.format_row_operations()
 
         if operations is not None:
+            if self.previous_window != self.get_window():
+                # The viewport has moved to follow the row operations:
+                # the previous matrix must be shown using the same window.
+                self.previously_formatted_matrix = self.format_matrix(
+                    self.previous_matrix
+                )
             display = Table("", "", "").grid()
             display.add_row(self.previously_formatted_matrix, operations, matrix)
-            console.print(display)
+            frame = [display]
         else:
-            console.print(matrix)
+            frame = [matrix]
+
+        if self.view_nb_rows:
+            rows = self.get_visible_rows()
+            cols = self.get_visible_cols(0, self.total_nb_cols)
+            frame.append(
+                "[viewport]"
+                + _("Viewport", self.lang)
+                % (
+                    rows.start + 1,
+                    rows.stop,
+                    self.nb_rows,
+                    cols.start + 1,
+                    cols.stop,
+                    self.total_nb_cols,
+                )
+            )
+            # Rows are replaced, never modified in place, by row operations;
+            # a shallow copy is thus enough to keep the previous values.
+            self.previous_matrix = list(self.matrix)
 
+        if self.renderer is None:
+            for part in frame:
+                self.console.print(part)
+        else:
+            self.renderer.render(self.console, frame)
         self.previously_formatted_matrix = matrix
+        self.previous_window = self.get_window()
 
-    def update_latex_content(self):
-        matrix = self.latex_format_matrix()
-
-        self.latex_content.append(LaTeX_begin_frame % self.latex_slide_no)
-        if self.latex_previously_formatted_matrix is None:
-            self.latex_content.append(matrix)
+    def set_renderer(self, mode):
+        """Chooses between printing each frame in full (mode "full")
+           and writing only the changes from the previous frame ("diff").
+        """
+        if mode == "diff":
+            self.renderer = DiffRenderer(self.output)
         else:
-            operations = self.latex_format_row_operations()
-            self.latex_content.append(
-                self.latex_previously_formatted_matrix
-                + " &\n"
-                + operations
-                + " &\n"
-                + matrix
+            self.renderer = None
+
+    def set_viewport(self, nb_rows, nb_cols):
+        """Sets the size of the window used to show large matrices;
+           a size of 0 x 0 means that the entire matrix is shown.
+        """
+        if (nb_rows == 0) != (nb_cols == 0):
+            self.print_error(_("Empty view", self.lang))
+            return
+        self.view_nb_rows = nb_rows
+        self.view_nb_cols = nb_cols
+        if self.matrix is not None and self.nb_rows:
+            self.scroll("up", 0)
+
+    def scroll(self, direction, steps):
+        """Moves the viewport window and shows the matrix."""
+        if self.matrix is None or not self.nb_rows:
+            self.print_error(_("No matrix", self.lang))
+            return
+        if self.view_nb_rows:
+            row_step, col_step = SCROLL_DIRECTIONS[direction]
+            self.view_top += row_step * steps
+            self.view_left += col_step * steps
+            self.clamp_viewport()
+        self.current_row_operations.clear()
+        self.console_print()
+
+    def clamp_viewport(self):
+        """Ensures that the viewport window is inside the matrix."""
+        self.view_top = max(0, min(self.view_top, self.nb_rows - self.view_nb_rows))
+        self.view_left = max(
+            0, min(self.view_left, self.total_nb_cols - self.view_nb_cols)
+        )
+
+    def follow_row_operations(self):
+        """Moves the viewport window, if needed, so that the rows changed
+           by the last row operation are visible.
+        """
+        if not self.view_nb_rows or not self.current_row_operations:
+            return
+        first = min(self.current_row_operations)
+        last = max(self.current_row_operations)
+        if last - first < self.view_nb_rows:
+            # Move as little as possible while showing all changed rows
+            self.view_top = max(
+                last - self.view_nb_rows + 1, min(self.view_top, first)
             )
-        self.latex_content.append(LaTeX_end_frame)
-        self.latex_slide_no += 1
-        self.latex_previously_formatted_matrix = matrix
+        else:
+            self.view_top = first
+        self.clamp_viewport()
+
+    def get_window(self):
+        """Identifies the part of the matrix currently shown"""
+        if not self.view_nb_rows:
+            return None
+        return (self.view_top, self.view_left, self.view_nb_rows, self.view_nb_cols)
+
+    def get_visible_rows(self):
+        """Range of row indices shown"""
+        if not self.view_nb_rows:
+            return range(len(self.matrix))
+        return range(
+            self.view_top, min(self.view_top + self.view_nb_rows, len(self.matrix))
+        )
 
-    def latex_format_matrix(self):
+    def get_visible_cols(self, start, end):
+        """Range of column indices shown, between start and end"""
+        if not self.view_nb_cols:
+            return range(start, end)
+        return range(
+            max(start, self.view_left), min(end, self.view_left + self.view_nb_cols)
+        )
+
+    def get_latex_document(self):
+        """Returns the LaTeX document showing all the row operations done
+           on the current matrix, one frame per step.
+
+           Nothing is prepared while the row operations are done: the
+           frames are generated in a single pass, replaying the operations
+           logged by the engine from the initial matrix.  The growth and
+           the letter used for rows at each step are those recorded by
+           process(); a ValueError is raised if a step was not recorded.
+        """
+        nb_steps = len(self.engine.log) + 1
+        if not nb_steps == len(self.growth_history) == len(self.step_row_names):
+            raise ValueError("Each step must be recorded by process().")
+        content = [LaTeX_begin_document]
+        previously_formatted_matrix = None
+        steps = [((), self.engine.initial_matrix)]
+        steps = itertools.chain(steps, self.engine.replay(self.engine.initial_matrix))
+        for step, (operations, matrix) in enumerate(steps):
+            slide_no = step + 1
+            formatted_matrix = self.latex_format_matrix(matrix)
+            content.append(
+                LaTeX_growth_comment % ((slide_no,) + self.growth_history[step])
+            )
+            content.append(LaTeX_begin_frame % slide_no)
+            if previously_formatted_matrix is None:
+                content.append(formatted_matrix)
+            else:
+                content.append(
+                    previously_formatted_matrix
+                    + " &\n"
+                    + self.latex_format_row_operations(
+                        operations, self.step_row_names[step]
+                    )
+                    + " &\n"
+                    + formatted_matrix
+                )
+            content.append(LaTeX_end_frame)
+            previously_formatted_matrix = formatted_matrix
+        content.append(LaTeX_end_document)
+        return "\n".join(content)
+
+    def latex_format_matrix(self, rows):
         if self.nb_augmented_cols:
             matrix = [
                 LaTeX_begin_bmatrix
@@ -571,7 +2899,7 @@ class Assistant:
         else:
             matrix = [LaTeX_begin_bmatrix % (("r" * self.nb_cols), "")]
 
-        for row in self.matrix:
+        for row in rows:
             row_content = []
             for col in row:
                 row_content.append(self.latex_format_frac(col))
@@ -586,56 +2914,108 @@ class Assistant:
            if number is a fraction, it is returned as a pre-defined
            LaTeX command.
         """
+        if not isinstance(number, Fraction):
+            return sympy.latex(number)
         if number.denominator == 1:
             return str(number.numerator)
         else:
             return "\\GJAfrac{%d}{%d}" % (number.numerator, number.denominator)
 
-    def latex_format_row_operations(self):
+    def format_factor(self, factor, latex=False):
+        """Formats the factor of a row operation; symbolic expressions
+           are put between parentheses unless they are a single symbol
+           or number.
+        """
+        text = self.latex_format_frac(factor) if latex else str(factor)
+        if isinstance(factor, Fraction) or factor.is_Atom:
+            return text
+        if latex:
+            return "\\left(" + text + "\\right)"
+        return "(" + text + ")"
+
+    def format_linear_combination(self, constant, terms):
+        """Formats a constant plus a linear combination of variables,
+           given as (coefficient, name) pairs, omitting zero terms.
+        """
+        text = "" if constant == 0 else str(constant)
+        for coefficient, name in terms:
+            if coefficient == 0:
+                continue
+            sign = "+"
+            if is_negative(coefficient):
+                sign, coefficient = "-", -coefficient
+            factor = "" if coefficient == 1 else self.format_factor(coefficient) + " "
+            if text:
+                text += f" {sign} {factor}{name}"
+            else:
+                text = ("-" if sign == "-" else "") + factor + name
+        return text or "0"
+
+    def format_vectors(self, vectors):
+        """Formats column vectors side by side, as the columns of a matrix."""
+        columns = Table().grid(padding=(0, 1), pad_edge=True)
+        for _vector in vectors:
+            columns.add_column(style="matrix_element", justify="right")
+        for row in zip(*vectors):
+            columns.add_row(*(str(entry) for entry in row))
+
+        formatted = Table(
+            "", show_header=False, box=MATRIX, style="matrix", pad_edge=False,
+        )
+        formatted.add_row(columns)
+        return formatted
+
+    def latex_format_row_operations(self, operations, R):
         """Formats row operations to align them with the changed line
-           in the matrix.
+           in the matrix; R is the letter used for rows.
         """
-        if not self.current_row_operations:
-            return None
+        descriptions = {
+            operation.target: self.latex_describe_row_operation(operation, R)
+            for operation in operations
+        }
 
         matrix = [LaTeX_begin_row_op_matrix]
 
-        for row_idx, row in enumerate(self.matrix):
-            if row_idx in self.current_row_operations:
-                matrix.append(self.latex_current_row_operations[row_idx])
+        for row_idx in range(self.nb_rows):
+            if row_idx in descriptions:
+                matrix.append(descriptions[row_idx])
             else:
                 matrix.append(r"\\")
         matrix.append(LaTeX_end_row_op_matrix)
 
         return "\n".join(matrix)
 
-    def get_column_format(self):
-        """Custom format for columns"""
-        col_max_widths = [0 for x in range(self.total_nb_cols)]
+    def get_column_format(self, matrix, cols):
+        """Custom format for the visible columns"""
+        col_max_widths = {col_idx: 0 for col_idx in cols}
 
         # determine maximum width of each column
-        for row in self.matrix:
-            for col_idx, col_info in enumerate(zip(col_max_widths, row)):
-                max_width, entry = col_info
-                if len(str(entry)) > max_width:
-                    col_max_widths[col_idx] = len(str(entry))
-
-        return [" {:>%ds} " % width for width in col_max_widths]
-
-    def find_leading_zeros(self):
+        for row_idx in self.get_visible_rows():
+            row = matrix[row_idx]
+            for col_idx, max_width in col_max_widths.items():
+                if len(str(row[col_idx])) > max_width:
+                    col_max_widths[col_idx] = len(str(row[col_idx]))
+
+        return {
+            col_idx: " {:>%ds} " % width for col_idx, width in col_max_widths.items()
+        }
+
+    def find_leading_zeros(self, matrix, cols):
+        """Finds the leading zeros, up to the last visible column"""
         self.leading_zeros = set()
-        for row_idx, row in enumerate(self.matrix):
-            for col_idx, value in enumerate(row):
+        for row_idx in self.get_visible_rows():
+            for col_idx, value in enumerate(matrix[row_idx][: cols.stop]):
                 if value == 0:
                     self.leading_zeros.add((row_idx, col_idx))
                 else:
                     break
 
-    def format_submatrix(self, start, end):
+    def format_submatrix(self, matrix, cols):
         """Formats the elements of a submatrix in right-justified columns.
            By submatrix, we mean either the coefficient matrix, or the
            elements on the right-hand side of the vertical bar for an
-           augmented matrix.
+           augmented matrix.  Only the visible rows and columns (cols)
+           are formatted.
         """
         ##################################
         # Using rich, it would be easy to produce a grid of numbers
@@ -645,54 +3025,61 @@ class Assistant:
         # For this reason, I use a more complex, but potentially
         # more versatile approach.
         #
-        col_format = self.get_column_format()
-        self.find_leading_zeros()
+        col_format = self.get_column_format(matrix, cols)
+        self.find_leading_zeros(matrix, cols)
 
-        matrix = Table().grid()
-        matrix.add_column(style="matrix_element")
+        submatrix = Table().grid()
+        submatrix.add_column(style="matrix_element")
 
-        last_row_idx = len(self.matrix) - 1
+        rows = self.get_visible_rows()
 
-        for row_idx, row in enumerate(self.matrix):
+        for row_idx in rows:
+            row = matrix[row_idx]
             content = ""
-            for col_idx, column in enumerate(row[start:end], start):
+            for col_idx in cols:
                 if (row_idx, col_idx) in self.leading_zeros:
                     content += (
                         "[echelon]"
-                        + col_format[col_idx].format(str(column))
+                        + col_format[col_idx].format(str(row[col_idx]))
                         + "[/echelon]"
                     )
                 else:
-                    content += col_format[col_idx].format(str(column))
-            matrix.add_row(content)
+                    content += col_format[col_idx].format(str(row[col_idx]))
+            submatrix.add_row(content)
             content = ""
-            if row_idx != last_row_idx:
-                for col_idx, column in enumerate(row[start:end], start):
+            if row_idx != rows[-1]:
+                for col_idx in cols:
                     if (row_idx, col_idx,) in self.leading_zeros:
                         content += (
                             "[echelon]" + col_format[col_idx].format("") + "[/echelon]"
                         )
                     else:
                         content += col_format[col_idx].format("")
-                matrix.add_row(content)
-        return matrix
+                submatrix.add_row(content)
+        return submatrix
 
-    def format_matrix(self):
+    def format_matrix(self, matrix=None):
         """Formats matrix for printing in console.
         """
-        coeff_matrix = self.format_submatrix(0, self.nb_cols)
+        if matrix is None:
+            matrix = self.matrix
+        # The matrix can have extra augmented columns, such as
+        # the right-hand sides to be solved.
+        coeff_cols = self.get_visible_cols(0, self.nb_cols)
+        augm_cols = self.get_visible_cols(self.nb_cols, len(matrix[0]))
+        submatrices = [
+            self.format_submatrix(matrix, cols)
+            for cols in (coeff_cols, augm_cols)
+            if cols
+        ]
 
-        matrix = Table(
+        formatted = Table(
             "", show_header=False, box=MATRIX, style="matrix", pad_edge=False,
         )
-        if not self.nb_augmented_cols:
-            matrix.add_row(coeff_matrix)
-            return matrix
-        else:
-            augm = self.format_submatrix(self.nb_cols, self.total_nb_cols + 1)
-            matrix.add_column()
-            matrix.add_row(coeff_matrix, augm)
-            return matrix
+        if len(submatrices) > 1:
+            formatted.add_column()
+        formatted.add_row(*submatrices)
+        return formatted
 
     def format_row_operations(self):
         """Formats row operations to align them with the changed line
@@ -713,7 +3100,7 @@ class Assistant:
         operations.add_column(style="row_operation")
 
         operations.add_row()
-        for row_idx, row in enumerate(self.matrix):
+        for row_idx in self.get_visible_rows():
             if row_idx in self.current_row_operations:
                 operations.add_row(fmt.format(self.current_row_operations[row_idx]))
             else:
@@ -722,229 +3109,426 @@ class Assistant:
 
         return operations
 
-    @staticmethod
-    def print_error(text):
-        console.print("\n    [error]" + text)
-        print()
-
-    def user_input(self):
-        return console.input("[prompt]" + self.prompt)
-
-    def scale_row(self, factor, row, target_row):
-        """f R_i  -->  R_i
-
-           factor = f
-           row = i
-           target_row should be equal to row
-
-           Returns True if the operation could be performed, False otherwise.
-        """
-        row = row - 1
-        target_row = target_row - 1
-        if not self.validate_scale_row(row, target_row, factor):
-            self.current_row_operations.clear()
-            return False
-
-        self.matrix[row] = [
-            factor * self.matrix[row][col] for col in range(len(self.matrix[row]))
-        ]
-        R = _("R_or_L")
-        self.current_row_operations[
-            target_row
-        ] = f"{factor} [same_row]{R}_{row+1}[/same_row] {RIGHT_ARROW} [same_row]{R}_{row+1}[/same_row]"
+    def print_error(self, text):
+        self.console.print("\n    [error]" + text)
+        self.console.print()
 
-        factor = self.latex_format_frac(factor)
+    def print_errors(self, texts):
+        self.console.print("\n    [error]" + "\n    ".join(texts))
+        self.console.print()
 
-        self.latex_current_row_operations[target_row] = (
-            "\\scriptstyle " + f"{factor}{R}_{row+1} \\longrightarrow {R}_{row+1} \\\\"
-        )
-        return True
+    def user_input(self):
+        command = self.console.input("[prompt]" + self.prompt)
+        # The terminal echoes the end of line typed by the user
+        self.output.nb_lines += 1
+        return command
 
-    def validate_scale_row(self, row, target_row, factor):
-        """Verifies that parameters in scaling transformation are valid.
-           Returns False if invalid parameters, True otherwise.
+    def save_latex(self, event=None):
+        """Saves the entire operations done on current matrix as a
+           LaTeX file.
         """
-        if row != target_row:
-            self.print_error(_("Scalar multiplication on same line"))
-            return False
-        if not (0 <= row < len(self.matrix)):
-            self.print_error(_("Row does not exist") % (row + 1))
-            return False
-        if factor == 0:
-            self.print_error(_("Cannot multiply by zero"))
-            return False
-        return True
+        if self.matrix is None:
+            self.print_error(_("Nothing to save", self.lang))
+            return
+        if not self.local_files:
+            self.print_error(_("Local files only", self.lang))
+            return
+        import tkinter
+        from tkinter import filedialog
 
-    def interchange_rows(self, row_1, row_2):
-        """R_i <--> R_j
+        filename = None
 
-           row_1 = i
-           row_2 = j
+        app = tkinter.Tk()
 
-           Returns True if the operation could be performed, False otherwise.
-        """
-        row_1 = row_1 - 1
-        row_2 = row_2 - 1
-        if not self.validate_interchange_rows(row_1, row_2):
-            self.current_row_operations.clear()
-            return False
+        try:
+            filename = filedialog.asksaveasfilename(filetypes=(("LaTeX", "*.tex"),))
+        except FileNotFoundError:
+            pass
+        app.destroy()
+        if filename and filename is not None:
+            text = self.get_latex_document()
+            with open(filename, "w") as f:
+                f.write(text)
+            self.console.print(_("saved file", self.lang) % filename)
 
-        self.matrix[row_1], self.matrix[row_2] = self.matrix[row_2], self.matrix[row_1]
 
-        R = _("R_or_L")
+# ===============================================
+# Grading of student submissions
+#
+# Each submission is a list of row operations, written as they would
+# be entered in the assistant, to be applied to the same starting matrix.
+# Submissions are graded in parallel, using a pool of processes.
+# ===============================================
 
-        self.current_row_operations[
-            row_2
-        ] = f"{R}_{row_1+1} {RIGHT_ARROW} {R}_{row_2+1}"
-        self.current_row_operations[
-            row_1
-        ] = f"{R}_{row_2+1} {RIGHT_ARROW} {R}_{row_1+1}"
 
-        self.latex_current_row_operations[row_2] = (
-            "\\scriptstyle " + f"{R}_{row_1+1} \\longrightarrow {R}_{row_2+1} \\\\"
-        )
-        self.latex_current_row_operations[row_1] = (
-            "\\scriptstyle " + f"{R}_{row_2+1} \\longrightarrow {R}_{row_1+1} \\\\"
+# Set in each worker process by init_grader
+grader = None
+grader_initial_matrix = None
+grader_lang = "en"
+
+
+def init_grader(rows, nb_augmented_cols, lang):
+    """Creates, once per worker process, the starting matrix shared by
+       all the submissions.
+    """
+    global grader, grader_initial_matrix, grader_lang
+    grader = Engine(rows, nb_augmented_cols)
+    # Neither the determinant nor the log of operations is needed for grading
+    grader.determinant = None
+    grader.log = None
+    grader_initial_matrix = tuple(grader.matrix)
+    grader_lang = lang
+
+
+def grade_chunk(submissions):
+    """Grades a list of submissions, given as (name, commands) pairs.
+
+    Submissions are expected to be sorted by their commands, so that
+    consecutive submissions often begin with the same row operations;
+    the matrices obtained after each row operation of the previous
+    submission are kept so that these common operations are not
+    replayed.
+
+    Returns a list of tuples
+    (name, legal, error_step, error_command, error_message, rref).
+    """
+    path = []  # (command, matrix) after each step of the previous submission
+    results = []
+    for name, commands in submissions:
+        nb_common = 0
+        for (command, matrix), new_command in zip(path, commands):
+            if command != new_command:
+                break
+            nb_common += 1
+        del path[nb_common:]
+        grader.matrix = list(path[-1][1] if path else grader_initial_matrix)
+
+        error = ("", "", "")
+        for step, command in enumerate(commands[nb_common:], nb_common + 1):
+            try:
+                grader.apply(command)
+            except RowOperationError as e:
+                error = (step, command, e.message(grader_lang))
+                break
+            path.append((command, tuple(grader.matrix)))
+        results.append(
+            (name, not error[0], *error, grader.is_reduced_row_echelon_form())
         )
-
-        return True
-
-    def validate_interchange_rows(self, row_1, row_2):
-        """Verifies that parameters in row exchange transformation are valid.
-           Returns False if invalid parameters, True otherwise.
-        """
-        if row_1 == row_2:
-            self.print_error(_("No effect"))
-            return False
-        if not (0 <= row_1 < len(self.matrix)):
-            self.print_error(_("Row does not exist") % (row_1 + 1))
-            return False
-        if not (0 <= row_2 < len(self.matrix)):
-            self.print_error(_("Row does not exist") % (row_2 + 1))
-            return False
-        return True
-
-    def linear_combo_1(self, row_1, op, row_2, target_row):
-        """R_i +/- R_j --> R_i
-
-           row_1 = i
-           op = +/-
-           row_2 = j
-           target_row should be the same as row_1
-
-           Returns True if the operation could be performed, False otherwise.
-        """
-        row_1 = row_1 - 1
-        row_2 = row_2 - 1
-        target_row = target_row - 1
-        if not self.validate_linear_combo_1(row_1, row_2, target_row):
-            self.current_row_operations.clear()
-            return False
-
-        pm = 1 if op == "+" else -1
-        self.matrix[row_1] = [
-            x + pm * y for x, y in zip(self.matrix[row_1], self.matrix[row_2])
+    return results
+
+
+def read_submissions(path):
+    """Reads the submissions, either from a JSON file containing an object
+       mapping names to lists of row operations, or from a directory
+       containing one text file per submission, with one row operation
+       per line.
+
+       Returns a list of (name, commands) pairs.
+    """
+    if os.path.isdir(path):
+        submissions = []
+        for filename in sorted(os.listdir(path)):
+            with open(os.path.join(path, filename), encoding="utf8") as f:
+                commands = [line for line in f if line.strip()]
+            submissions.append((os.path.splitext(filename)[0], commands))
+    else:
+        with open(path, encoding="utf8") as f:
+            submissions = list(json.load(f).items())
+    # Normalizing spaces makes identical row operations easier to find.
+    return [
+        (name, [" ".join(command.split()) for command in commands])
+        for name, commands in submissions
+    ]
+
+
+def grade(
+    matrix_file, submissions_path, nb_augmented_cols=None, output=None, max_workers=None
+):
+    """Grades all the submissions found in submissions_path, using the
+       matrix read from matrix_file (see read_matrix_file) as the
+       starting matrix.
+
+       Results are written in CSV format, either in the output file
+       or on stdout.
+    """
+    console = Console(theme=dark_background_theme)
+    try:
+        rows, parsed_augmented_cols, errors = read_matrix_file(matrix_file)
+    except (OSError, UnicodeDecodeError):
+        errors = [_("Cannot read file") % matrix_file]
+    if nb_augmented_cols is None and not errors:
+        nb_augmented_cols = parsed_augmented_cols
+    if not errors and nb_augmented_cols >= len(rows[0]):
+        errors = [_("Too many augmented columns")]
+    if errors:
+        console.print("[error]" + "\n".join(errors))
+        return
+    submissions = sorted(read_submissions(submissions_path), key=lambda s: s[1])
+
+    max_workers = max_workers or os.cpu_count() or 1
+    # Contiguous chunks keep submissions with common operations together
+    chunk_size = max(1, -(-len(submissions) // (4 * max_workers)))
+    chunks = [
+        submissions[start : start + chunk_size]
+        for start in range(0, len(submissions), chunk_size)
+    ]
+    with ProcessPoolExecutor(
+        max_workers,
+        initializer=init_grader,
+        initargs=(rows, nb_augmented_cols, LANG),
+    ) as executor:
+        results = [
+            result for chunk in executor.map(grade_chunk, chunks) for result in chunk
         ]
-        R = _("R_or_L")
-        self.current_row_operations[
-            target_row
-        ] = f"[same_row]{R}_{row_1+1}[/same_row] {op} {R}_{row_2+1} {RIGHT_ARROW} [same_row]{R}_{target_row+1}[/same_row]"
-
-        self.latex_current_row_operations[target_row] = (
-            "\\scriptstyle "
-            + f"{R}_{row_1+1}{op} {R}_{row_2+1} \\longrightarrow {R}_{target_row+1} \\\\"
+    results.sort()
+
+    header = ["submission", "legal", "error_step", "error_command", "error", "rref"]
+    if output is None:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(header)
+        writer.writerows(results)
+        return
+    with open(output, "w", newline="", encoding="utf8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(results)
+    console.print(
+        _("Graded")
+        % (
+            len(results),
+            sum(result[1] for result in results),
+            sum(result[5] for result in results),
         )
+    )
+    console.print(_("saved file") % output)
 
-        return True
-
-    def validate_linear_combo_1(self, row_1, row_2, target_row):
-        """Verifies that parameters in linear combination '1' are valid.
-           Returns False if invalid parameters, True otherwise.
-        """
-        if not (0 <= row_1 < len(self.matrix)):
-            self.print_error(_("Row does not exist") % (row_1 + 1))
-            return False
-        if not (0 <= row_2 < len(self.matrix)):
-            self.print_error(_("Row does not exist") % (row_2 + 1))
-            return False
-        if row_1 != target_row:
-            self.print_error(_("Must be the same line"))
-            return False
-        if row_1 == row_2:
-            self.print_error(_("Cannot use a single line"))
-            return False
-        return True
-
-    def linear_combo_2(self, row_1, op, factor, row_2, target_row):
-        """R_i  +/- f R_j -->  R_i
-
-           row_1 = i
-           op = +/-
-           factor = f
-           row_2 = j
-           target_row should be the same as row_1
-
-           Returns True if the operation could be performed, False otherwise.
-        """
-        row_1 = row_1 - 1
-        row_2 = row_2 - 1
-        target_row = target_row - 1
 
-        if not self.validate_linear_combo_2(row_1, row_2, target_row, factor):
-            self.current_row_operations.clear()
-            return False
-
-        pm = 1 if op == "+" else -1
-        self.matrix[row_1] = [
-            x + factor * pm * y for x, y in zip(self.matrix[row_1], self.matrix[row_2])
-        ]
-        R = _("R_or_L")
-        self.current_row_operations[
-            target_row
-        ] = f"[same_row]{R}_{row_1+1}[/same_row] {op} {factor} {R}_{row_2+1} {RIGHT_ARROW} [same_row]{R}_{target_row+1}[/same_row]"
-
-        factor = self.latex_format_frac(factor)
-        self.latex_current_row_operations[target_row] = (
-            "\\scriptstyle "
-            + f"{R}_{row_1+1}{op} {factor} {R}_{row_2+1} \\longrightarrow {R}_{target_row+1} \\\\"
-        )
+# ===============================================
+# Serving many sessions from a single process
+# ===============================================
 
-        return True
+# Console size used for remote sessions
+SESSION_WIDTH = 100
+SESSION_HEIGHT = 40
+
+
+class Session:
+    """A remote session, with its own Assistant.
+
+       An idle session can be evicted: its Assistant is saved in a
+       snapshot file and removed from memory.  It is restored from that
+       file when needed, possibly after a new connection using the same
+       session name.
+
+       Commands are executed in worker threads, so that a long computation
+       does not block the other sessions; the lock keeps a session from
+       being evicted while it executes a command.
+    """
+
+    def __init__(self, name, snapshot_dir, lang):
+        self.name = name
+        self.snapshot = os.path.join(snapshot_dir, name + ".pickle")
+        self.assistant = None
+        self.lang = lang  # language of a new Assistant
+        self.last_activity = time.monotonic()
+        self.lock = threading.Lock()
+
+    def get_assistant(self):
+        """Returns the Assistant, restoring it from the snapshot if needed."""
+        if self.assistant is None:
+            if os.path.exists(self.snapshot):
+                with open(self.snapshot, "rb") as f:
+                    self.assistant = pickle.load(f)
+            else:
+                self.assistant = Assistant(interactive=False, lang=self.lang)
+                self.assistant.local_files = False
+            self.assistant.set_output(
+                io.StringIO(),
+                force_terminal=True,
+                width=SESSION_WIDTH,
+                height=SESSION_HEIGHT,
+            )
+        return self.assistant
 
-    def validate_linear_combo_2(self, row_1, row_2, target_row, factor):
-        """Verifies that parameters in linear combination '2' are valid.
-           Returns False if invalid parameters, True otherwise.
+    def process(self, command=None):
+        """Executes a command, if any, and returns the output followed
+           by the prompt, or None if the command ends the session.
         """
-        if not self.validate_linear_combo_1(row_1, row_2, target_row):
-            return False
-        if factor == 0:
-            self.print_error(_("No effect"))
-            return False
-        return True
-
-    def save_latex(self, event=None):
-        """Saves the entire operations done on current matrix as a
-           LaTeX file.
+        with self.lock:
+            self.last_activity = time.monotonic()
+            assistant = self.get_assistant()
+            if (
+                command is not None
+                and assistant.input_handler is None
+                and re.search(re_quit, command)
+            ):
+                return None
+
+            if command is not None:
+                # The client echoes the end of line typed by the user
+                assistant.output.nb_lines += 1
+                assistant.process(command)
+            assistant.console.print("[prompt]" + assistant.prompt, end="")
+
+            buffer = assistant.output.file
+            output = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return output
+
+    def evict(self, idle_timeout=None):
+        """Saves the Assistant in the snapshot file and frees it.
+
+           If idle_timeout is given, this is only done if the session has
+           been idle for that many seconds and is not executing a command;
+           otherwise, the command being executed, if any, is waited for.
         """
-        if self.matrix is None:
-            self.print_error(_("Nothing to save"))
+        if not self.lock.acquire(blocking=idle_timeout is None):
             return
-        filename = None
-
-        app = tkinter.Tk()
+        try:
+            if self.assistant is None or (
+                idle_timeout is not None
+                and time.monotonic() - self.last_activity < idle_timeout
+            ):
+                return
+            with open(self.snapshot, "wb") as f:
+                pickle.dump(self.assistant, f)
+            self.assistant = None
+        finally:
+            self.lock.release()
+
+
+async def serve_sessions(host, port, snapshot_dir, idle_timeout):
+    """Serves many sessions over TCP, all in the same process and
+       multiplexed on the asyncio event loop; commands are executed in
+       worker threads.  Each connection begins by asking for a session
+       name.
+
+       Sessions without activity for idle_timeout seconds are evicted
+       to snapshot files in snapshot_dir; sessions are also evicted when
+       the connection is closed.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    default_lang = LANG
+    sessions = {}  # open sessions, by name
+
+    async def send(writer, text):
+        writer.write(text.replace("\n", "\r\n").encode("utf8"))
+        await writer.drain()
+
+    async def handle_connection(reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            await send(writer, translations[default_lang]["Session name"])
+            name = (await reader.readline()).decode("utf8", "replace").strip()
+            if not re.fullmatch(r"\w{1,64}", name, re.ASCII):
+                await send(writer, translations[default_lang]["Invalid session name"])
+            elif name in sessions:
+                await send(
+                    writer, translations[default_lang]["Session already open"] % name
+                )
+            else:
+                session = sessions[name] = Session(name, snapshot_dir, default_lang)
+                try:
+                    output = await loop.run_in_executor(None, session.process)
+                    while output is not None:
+                        await send(writer, output)
+                        line = await reader.readline()
+                        if not line:
+                            break
+                        command = line.decode("utf8", "replace").rstrip("\r\n")
+                        output = await loop.run_in_executor(
+                            None, session.process, command
+                        )
+                finally:
+                    session.evict()
+                    del sessions[name]
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
 
+    async def evict_idle_sessions():
+        while True:
+            await asyncio.sleep(idle_timeout / 2)
+            for session in sessions.values():
+                session.evict(idle_timeout)
+
+    server = await asyncio.start_server(handle_connection, host, port)
+    evictor = asyncio.ensure_future(evict_idle_sessions())
+    Console(theme=dark_background_theme).print(_("Serving") % (host, port))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        evictor.cancel()
+
+
+def main(args=None):
+    """Runs the assistant or, with the grade command, the grader."""
+    global LANG
+    parser = argparse.ArgumentParser(prog="gja", description="Gauss-Jordan assistant")
+    subparsers = parser.add_subparsers(dest="command")
+    grade_parser = subparsers.add_parser(
+        "grade", help="grade student submissions of row operations"
+    )
+    grade_parser.add_argument("matrix", help="starting matrix (CSV or MatrixMarket)")
+    grade_parser.add_argument(
+        "submissions",
+        help="JSON file mapping names to lists of row operations, "
+        "or directory with one file of row operations per submission",
+    )
+    grade_parser.add_argument(
+        "-a", "--augmented", type=int, help="number of augmented columns"
+    )
+    grade_parser.add_argument("-o", "--output", help="CSV file for the results")
+    grade_parser.add_argument("-j", "--jobs", type=int, help="number of processes")
+    grade_parser.add_argument("--lang", choices=["en", "fr"], default=LANG)
+    benchmark_parser = subparsers.add_parser(
+        "benchmark",
+        help="compare the bytes written per step by the full and diff displays",
+    )
+    benchmark_parser.add_argument(
+        "-n", "--size", type=int, default=8, help="size of the random square matrix"
+    )
+    benchmark_parser.add_argument("--seed", type=int, default=0)
+    serve_parser = subparsers.add_parser(
+        "serve", help="serve many sessions over TCP, for use with telnet or netcat"
+    )
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8023)
+    serve_parser.add_argument(
+        "--snapshots",
+        default="gja_sessions",
+        help="directory where idle sessions are saved",
+    )
+    serve_parser.add_argument(
+        "--idle",
+        type=float,
+        default=600,
+        help="seconds without activity before a session is saved and freed",
+    )
+    serve_parser.add_argument("--lang", choices=["en", "fr"], default=LANG)
+    args = parser.parse_args(args)
+
+    if args.command == "grade":
+        LANG = args.lang
+        grade(args.matrix, args.submissions, args.augmented, args.output, args.jobs)
+    elif args.command == "benchmark":
+        Console().print(benchmark_display(args.size, args.seed))
+    elif args.command == "serve":
+        LANG = args.lang
         try:
-            filename = filedialog.asksaveasfilename(filetypes=(("LaTeX", "*.tex"),))
-        except FileNotFoundError:
+            asyncio.run(serve_sessions(args.host, args.port, args.snapshots, args.idle))
+        except KeyboardInterrupt:
             pass
-        app.destroy()
-        if filename and filename is not None:
-            self.latex_content.append(LaTeX_end_document)
-            text = "\n".join(self.latex_content)
-            with open(filename, "w") as f:
-                f.write(text)
-            console.print(_("saved file") % filename)
+    else:
+        # Since we already use Rich, we might as well get pretty tracebacks. :-)
+        from rich.traceback import install
+
+        install(extra_lines=1)
+        Assistant()
 
 
 if __name__ == "__main__":
-    Assistant()
+    main()